@@ -0,0 +1,22 @@
+<?php
+
+include $_composer_autoload_path ?? __DIR__ . '/../vendor/autoload.php';
+
+use Gulachek\Bassline\SqlRegistry;
+
+$sql_dir = __DIR__ . '/../sql';
+
+$missing = SqlRegistry::missingReferences($sql_dir, __DIR__ . '/../src');
+foreach ($missing as $name => $file)
+{
+	echo "Named query '$name' referenced in $file does not exist\n";
+}
+
+if ($missing)
+	exit(1);
+
+if ($err = SqlRegistry::compile($sql_dir))
+{
+	echo "$err\n";
+	exit(1);
+}
@@ -23,5 +23,26 @@ if (!$server->initializeSystem())
 	exit(1);
 }
 
-if ($argc < 3 || $argv[2] !== '--skip-client-build')
-	\system("$prjDir/bin/build-client.sh");
+if ($argc >= 3 && $argv[2] === '--skip-client-build')
+	exit(0);
+
+// rebuild only when the bundle's sources changed since the last build
+$bundleFingerprint = \Gulachek\Bassline\Fingerprint::ofFiles($prjDir, [
+	'static_src',
+	'buildlib',
+	'make.mjs',
+	'webpack.config.mjs',
+	'tsconfig.json',
+	'package.json',
+	'package-lock.json'
+]);
+
+$fingerprintFile = "$prjDir/assets/.fingerprint";
+if (@\file_get_contents($fingerprintFile) === $bundleFingerprint)
+	exit(0);
+
+\system("$prjDir/bin/build-client.sh", $status);
+if ($status !== 0)
+	exit(1);
+
+\file_put_contents($fingerprintFile, $bundleFingerprint);
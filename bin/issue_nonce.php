@@ -4,13 +4,20 @@ include $_composer_autoload_path ?? __DIR__ . '/../vendor/autoload.php';
 
 if ($argc < 3)
 {
-	echo "Usage: {$argv[0]} <config> <username>\n";
+	echo "Usage: {$argv[0]} <config> <username>...\n";
+	echo "       {$argv[0]} <config> --serve\n";
 	exit(1);
 }
 
 $server = new \Gulachek\Bassline\Server($argv[1]);
 
-if (!$server->issueNonce($argv[2]))
+if ($argv[2] === '--serve')
+{
+	$server->serveNonces(STDIN, STDOUT);
+	exit(0);
+}
+
+if (!$server->issueNonces(\array_slice($argv, 2)))
 {
 	exit(1);
 }
@@ -27,9 +27,8 @@ if (!isset($_SERVER['SITE_CONFIG_PATH'])) {
 
 $server = new \Gulachek\Bassline\Server();
 
-// TODO: add a way to generate static content config files and
-// opt out of this check via $_SERVER variable to go straight to
-// render()
-if (!$server->serveStaticContent()) {
+// set when the web server serves static content itself (see
+// bin/static_config.php)
+if (!empty($_SERVER['SKIP_STATIC_CONTENT']) || !$server->serveStaticContent()) {
 	$server->render();
 }
@@ -0,0 +1,30 @@
+<?php
+
+include $_composer_autoload_path ?? __DIR__ . '/../vendor/autoload.php';
+
+if ($argc < 2)
+{
+	echo "Usage: {$argv[0]} <config> [--precompressed] [output]\n";
+	exit(1);
+}
+
+$server = new \Gulachek\Bassline\Server($argv[1]);
+
+$args = \array_slice($argv, 2);
+$precompressed = \in_array('--precompressed', $args);
+$args = \array_values(\array_diff($args, ['--precompressed']));
+
+$conf = $server->nginxStaticConfig($precompressed);
+
+if (isset($args[0]))
+{
+	if (\file_put_contents($args[0], $conf) === false)
+	{
+		echo "Failed to write {$args[0]}\n";
+		exit(1);
+	}
+}
+else
+{
+	echo $conf;
+}
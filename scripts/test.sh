@@ -3,7 +3,7 @@
 echo "=============================="
 echo "Running phpunit..."
 echo "=============================="
-vendor/bin/phpunit test/phpunit || exit 1
+vendor/bin/phpunit --exclude-group benchmark test/phpunit || exit 1
 
 echo "=============================="
 echo "Running uitest.py..."
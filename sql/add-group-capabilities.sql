@@ -0,0 +1,7 @@
+INSERT INTO group_capabilities (group_id, cap_id)
+SELECT DISTINCT :group, e.cap_id
+FROM temp.group_capability_edits AS e
+WHERE NOT EXISTS (
+	SELECT 1 FROM group_capabilities AS gc
+	WHERE gc.group_id=:group AND gc.cap_id=e.cap_id
+);
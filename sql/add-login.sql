@@ -1,2 +1,2 @@
-INSERT INTO login (id, token, expiration)
-	VALUES (:id, :token, datetime('now', '+30 days'));
+INSERT INTO login (token_hash, id, expiration)
+	VALUES (CAST(:token_hash AS BLOB), :id, unixepoch() + 30 * 86400);
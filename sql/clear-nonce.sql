@@ -1,2 +1,2 @@
 DELETE FROM nonce_auth
-WHERE nonce=? OR (unixepoch(expiration) <= unixepoch());
+WHERE nonce_hash=CAST(? AS BLOB);
@@ -0,0 +1,2 @@
+DELETE FROM login WHERE expiration <= unixepoch();
+DELETE FROM nonce_auth WHERE expiration <= unixepoch();
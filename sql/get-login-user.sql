@@ -1,5 +1,9 @@
 SELECT
-	users.id AS id
-FROM users
-INNER JOIN login ON users.id = login.id
-WHERE token=? AND unixepoch(expiration) > unixepoch();
+	users.id AS id,
+	username,
+	is_superuser,
+	primary_group,
+	save_token
+FROM login
+INNER JOIN users ON users.id = login.id
+WHERE login.token_hash=CAST(? AS BLOB) AND login.expiration > unixepoch();
@@ -43,14 +43,38 @@ CREATE TABLE google_auth (
 	user_id INTEGER NOT NULL
 );
 
+-- tokens are looked up by their sha256, expiration is unix time
 CREATE TABLE nonce_auth (
+	nonce_hash BLOB PRIMARY KEY,
 	user_id INTEGER NOT NULL,
-	nonce TEXT UNIQUE NOT NULL,
-	expiration TEXT NOT NULL
-);
+	expiration INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX nonce_auth_by_expiration ON nonce_auth(expiration);
 
 CREATE TABLE login (
+	token_hash BLOB PRIMARY KEY,
 	id INTEGER NOT NULL, -- user id
-	token TEXT UNIQUE NOT NULL,
-	expiration TEXT NOT NULL
-);
+	expiration INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX login_by_user ON login(id, expiration);
+CREATE INDEX login_by_expiration ON login(expiration);
+
+CREATE INDEX group_membership_by_user
+	ON group_membership(user_id, group_id);
+
+CREATE INDEX group_membership_by_group
+	ON group_membership(group_id, user_id);
+
+CREATE INDEX group_capabilities_by_group
+	ON group_capabilities(group_id, cap_id);
+
+CREATE INDEX group_capabilities_by_cap
+	ON group_capabilities(cap_id, group_id);
+
+CREATE INDEX google_auth_by_user
+	ON google_auth(user_id);
+
+-- this schema already includes sql/migrate/security up to here
+PRAGMA user_version = 2;
@@ -1,2 +1,2 @@
-INSERT INTO nonce_auth (user_id, nonce, expiration)
-VALUES (:user_id, :nonce, datetime('now', '+5 minutes'));
+INSERT INTO nonce_auth (nonce_hash, user_id, expiration)
+VALUES (CAST(:nonce_hash AS BLOB), :user_id, unixepoch() + 5 * 60);
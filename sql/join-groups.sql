@@ -0,0 +1,7 @@
+INSERT INTO group_membership (user_id, group_id)
+SELECT DISTINCT :user, e.group_id
+FROM temp.user_group_edits AS e
+WHERE NOT EXISTS (
+	SELECT 1 FROM group_membership AS gm
+	WHERE gm.user_id=:user AND gm.group_id=e.group_id
+);
@@ -0,0 +1,4 @@
+DELETE FROM group_membership
+WHERE user_id=? AND group_id NOT IN (
+	SELECT group_id FROM temp.user_group_edits
+);
@@ -1,2 +1,2 @@
 SELECT user_id FROM nonce_auth
-WHERE nonce = ? AND (unixepoch(expiration) > unixepoch());
+WHERE nonce_hash = CAST(? AS BLOB) AND expiration > unixepoch();
@@ -0,0 +1,50 @@
+-- Themes with ids in the json array parameter, with their palette,
+-- colors and mappings aggregated into json objects keyed by id
+SELECT
+	t.id AS id,
+	t.name AS name,
+	t.save_token AS save_token,
+	t.palette AS palette_id,
+	(
+		SELECT json_object(
+			'id', p.id,
+			'name', p.name,
+			'save_token', p.save_token,
+			'colors', (
+				SELECT json_group_object(pc.id, json_object(
+					'id', pc.id,
+					'name', pc.name,
+					'hex', pc.hex,
+					'shades', pc.shades
+				))
+				FROM palette_color AS pc
+				WHERE pc.palette = p.id
+			)
+		)
+		FROM palette AS p
+		WHERE p.id = t.palette
+	) AS palette,
+	(
+		SELECT json_group_object(tc.id, json_object(
+			'id', tc.id,
+			'name', tc.name,
+			'palette_color', tc.palette_color,
+			'lightness', tc.lightness,
+			'system_color', tc.system_color
+		))
+		FROM theme_color AS tc
+		WHERE tc.theme = t.id
+	) AS theme_colors,
+	(
+		SELECT json_group_object(m.id, json_object(
+			'id', m.id,
+			'app', a.app,
+			'name', a.name,
+			'theme_color', m.theme_color
+		))
+		FROM theme_color_map AS m
+		INNER JOIN app_color AS a ON m.app_color = a.id
+		WHERE m.theme = t.id
+	) AS mappings
+FROM theme AS t
+WHERE t.id IN (SELECT value FROM json_each(?));
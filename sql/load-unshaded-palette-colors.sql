@@ -0,0 +1 @@
+SELECT id,hex FROM palette_color WHERE shades IS NULL;
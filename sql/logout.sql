@@ -1,2 +1,2 @@
 DELETE FROM login
-WHERE token=?;
+WHERE token_hash=CAST(? AS BLOB);
@@ -1,3 +0,0 @@
-UPDATE theme_color_map
-SET theme_color=:theme_color
-WHERE id=:id AND theme=:theme;
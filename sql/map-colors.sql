@@ -0,0 +1,4 @@
+UPDATE theme_color_map
+SET theme_color=e.theme_color
+FROM temp.theme_color_map_edits AS e
+WHERE theme_color_map.id=e.id AND theme_color_map.theme=?;
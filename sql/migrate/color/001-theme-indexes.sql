@@ -0,0 +1,6 @@
+-- Lookups of a theme's colors and a palette's colors
+CREATE INDEX IF NOT EXISTS theme_color_by_theme
+	ON theme_color(theme);
+
+CREATE INDEX IF NOT EXISTS palette_color_by_palette
+	ON palette_color(palette);
@@ -0,0 +1,3 @@
+-- SRGB::shadeTable() of each palette color's hex, or NULL until it's
+-- computed
+ALTER TABLE palette_color ADD COLUMN shades TEXT;
@@ -0,0 +1,4 @@
+CREATE TABLE IF NOT EXISTS props (
+	name TEXT UNIQUE,
+	value TEXT
+);
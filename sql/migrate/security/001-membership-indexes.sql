@@ -0,0 +1,15 @@
+-- Covering indexes for capability and membership lookups
+CREATE INDEX IF NOT EXISTS group_membership_by_user
+	ON group_membership(user_id, group_id);
+
+CREATE INDEX IF NOT EXISTS group_membership_by_group
+	ON group_membership(group_id, user_id);
+
+CREATE INDEX IF NOT EXISTS group_capabilities_by_group
+	ON group_capabilities(group_id, cap_id);
+
+CREATE INDEX IF NOT EXISTS group_capabilities_by_cap
+	ON group_capabilities(cap_id, group_id);
+
+CREATE INDEX IF NOT EXISTS google_auth_by_user
+	ON google_auth(user_id);
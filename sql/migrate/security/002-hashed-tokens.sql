@@ -0,0 +1,23 @@
+-- Look up sessions and nonces by the sha256 of their token instead of
+-- the token itself. Expiration is unix time so comparisons can use the
+-- index. Existing tokens can't be hashed here, so everyone logs in again.
+DROP TABLE IF EXISTS login;
+
+CREATE TABLE login (
+	token_hash BLOB PRIMARY KEY,
+	id INTEGER NOT NULL, -- user id
+	expiration INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX login_by_user ON login(id, expiration);
+CREATE INDEX login_by_expiration ON login(expiration);
+
+DROP TABLE IF EXISTS nonce_auth;
+
+CREATE TABLE nonce_auth (
+	nonce_hash BLOB PRIMARY KEY,
+	user_id INTEGER NOT NULL,
+	expiration INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX nonce_auth_by_expiration ON nonce_auth(expiration);
@@ -0,0 +1,4 @@
+DELETE FROM group_capabilities
+WHERE group_id=? AND cap_id NOT IN (
+	SELECT cap_id FROM temp.group_capability_edits
+);
@@ -0,0 +1,4 @@
+UPDATE palette_color
+SET shades=s.shades
+FROM temp.palette_color_shades AS s
+WHERE palette_color.id=s.id;
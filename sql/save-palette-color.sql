@@ -1,5 +0,0 @@
-UPDATE palette_color
-SET
-	name=:name,
-	hex=:hex
-WHERE id=:id;
@@ -0,0 +1,7 @@
+UPDATE palette_color
+SET
+	name=e.name,
+	hex=e.hex,
+	shades=e.shades
+FROM temp.palette_color_edits AS e
+WHERE palette_color.id=e.id AND palette_color.palette=?;
@@ -0,0 +1,7 @@
+UPDATE theme_color
+SET
+	name=e.name,
+	palette_color=e.palette_color,
+	lightness=e.lightness
+FROM temp.theme_color_edits AS e
+WHERE theme_color.id=e.id AND theme_color.theme=?; -- redundant validation to make sure saving to correct theme
@@ -0,0 +1,8 @@
+-- Only if the revision the sheet was rendered from is still current,
+-- so a concurrent theme change isn't overwritten by an older sheet
+INSERT OR REPLACE INTO props (name, value)
+SELECT 'site-theme-css-hash', :hash
+WHERE coalesce(
+	(SELECT value FROM props WHERE name = 'theme-css-revision'),
+	'initial'
+) = :revision;
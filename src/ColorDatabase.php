@@ -16,7 +16,7 @@ class ColorDatabase
 	static function fromConfig(Config $config): ColorDatabase
 	{
 		$path = "{$config->dataDir()}/color.db";
-		return new ColorDatabase(new Database(new \Sqlite3($path)));
+		return new ColorDatabase(Database::open($path));
 	}
 
 	public function lock(): bool
@@ -29,6 +29,11 @@ class ColorDatabase
 		$this->db->unlock();
 	}
 
+	public function rollback(): void
+	{
+		$this->db->rollback();
+	}
+
 	private function createTempSrcColors(array $apps): void
 	{
 		$this->db->exec('temp-src-colors');
@@ -50,14 +55,32 @@ class ColorDatabase
 		$stmt->close();
 	}
 
+	public function installedFingerprint(): ?string
+	{
+		return $this->db->installedFingerprint();
+	}
+
+	public function saveInstalledFingerprint(string $fingerprint): void
+	{
+		$this->db->saveInstalledFingerprint($fingerprint);
+	}
+
 	public function installWithApps(array $apps): ?string
 	{
 		if ($err = $this->initReentrant())
 			return $err;
 
+		if ($err = $this->db->migrate('migrate/color'))
+			return $err;
+
+		$this->fillMissingShades();
+
 		$this->createTempSrcColors($apps);
 
 		$this->db->exec('consume-temp-src-colors');
+
+		// app colors or the theme.css template may have changed
+		$this->invalidateThemeCss();
 		return null;
 	}
 
@@ -72,6 +95,10 @@ class ColorDatabase
 		$this->db->exec('init-color');
 		$this->db->exec('init-system-colors');
 
+		// the default palette is saved with columns from migrations
+		if ($err = $this->db->migrate('migrate/color'))
+			return $err;
+
 		$palette = $this->createPalette('Default');
 		foreach ($palette['colors'] as $id => $color)
 		{
@@ -135,6 +162,7 @@ class ColorDatabase
 	{
 		$this->db->query('unlink-theme-color', $id);
 		$this->db->query('delete-palette-color', $id);
+		$this->invalidateThemeCss();
 	}
 
 	public function getPaletteFromColor(int $color_id): int
@@ -150,18 +178,48 @@ class ColorDatabase
 			':save_token' => $palette['save_token']
 		]);
 
+		$colors = [];
 		foreach ($palette['colors'] as $color)
 		{
-			$this->db->query('save-palette-color', [
-				':id' => $color['id'],
-				':name' => $color['name'],
-				':hex' => $color['hex']
-			]);
+			$colors[] = [
+				'id' => $color['id'],
+				'name' => $color['name'],
+				'hex' => $color['hex'],
+				'shades' => SRGB::shadeTable($color['hex'])
+			];
 		}
 
+		if ($colors)
+		{
+			$this->db->withTempTable('palette_color_edits', $colors, [
+				'id' => 'INTEGER',
+				'name' => 'TEXT',
+				'hex' => 'TEXT',
+				'shades' => 'TEXT'
+			], fn() => $this->db->query('save-palette-colors', $palette['id']));
+		}
+
+		$this->invalidateThemeCss();
 		return true;
 	}
 
+	// palette colors from before shade tables were stored
+	private function fillMissingShades(): void
+	{
+		$hexes = $this->db->query('load-unshaded-palette-colors')->indexById();
+		if (!$hexes)
+			return;
+
+		$shades = [];
+		foreach (SRGB::shadeTables(\array_column($hexes, 'hex', 'id')) as $id => $table)
+			$shades[] = ['id' => $id, 'shades' => $table];
+
+		$this->db->withTempTable('palette_color_shades', $shades, [
+			'id' => 'INTEGER',
+			'shades' => 'TEXT'
+		], fn() => $this->db->query('save-palette-color-shades'));
+	}
+
 	public function createTheme(bool $isDark): array
 	{
 		$this->db->query('create-theme');
@@ -180,32 +238,62 @@ class ColorDatabase
 
 	public function loadTheme(int $theme_id): ?array
 	{
-		$row = $this->db->loadRowUnsafe('theme', $theme_id);
-
-		if (!$row)
-			return null;
+		return $this->loadThemes([$theme_id])[$theme_id] ?? null;
+	}
 
-		$theme = [
-			'id' => $row['id'],
-			'name' => $row['name'],
-			'save_token' => $row['save_token']
-		];
+	// id => theme for every id that exists, in one query. Shade tables
+	// are only needed to render CSS, so they're left out by default.
+	public function loadThemes(array $theme_ids, bool $withShades = false): array
+	{
+		$themes = [];
+		if (!$theme_ids)
+			return $themes;
 
-		if (is_int($row['palette']))
+		$ids = \json_encode(\array_values(\array_unique($theme_ids)));
+		foreach ($this->db->query('load-themes-deep', $ids)->rows() as $row)
 		{
-			if (!$theme['palette'] = $this->loadPalette($row['palette']))
-				throw new \Exception("theme $theme_id has a corrupt palette id {$row['palette']}");
+			$id = $row['id'];
+			$theme = [
+				'id' => $id,
+				'name' => $row['name'],
+				'save_token' => $row['save_token']
+			];
+
+			if (is_int($row['palette_id']))
+			{
+				if (!$theme['palette'] = \json_decode($row['palette'] ?? 'null', true))
+					throw new \Exception("theme $id has a corrupt palette id {$row['palette_id']}");
+
+				if (!$withShades)
+				{
+					foreach ($theme['palette']['colors'] as &$color)
+						unset($color['shades']);
+					unset($color);
+				}
+			}
+
+			$theme['themeColors'] = \json_decode($row['theme_colors'], true);
+			$theme['mappings'] = \json_decode($row['mappings'], true);
+			$themes[$id] = $theme;
 		}
 
-		// load theme colors
-		$result = $this->db->query('load-theme-colors', $theme_id);
-		$theme['themeColors'] = $result->indexById();
+		return $themes;
+	}
 
-		// load color mappings
-		$result = $this->db->query('load-theme-color-map', $theme_id);
-		$theme['mappings'] = $result->indexById();
+	// 'light'/'dark' => theme for the active themes
+	public function loadActiveThemes(): array
+	{
+		$active = $this->getActiveThemes();
+		$themes = $this->loadThemes($active, withShades: true);
 
-		return $theme;
+		$out = [];
+		foreach ($active as $type => $id)
+		{
+			if (isset($themes[$id]))
+				$out[$type] = $themes[$id];
+		}
+
+		return $out;
 	}
 
 	public function saveTheme(array $theme): void
@@ -216,25 +304,47 @@ class ColorDatabase
 			':save_token' => $theme['save_token']
 		]);
 
+		// only what changed is sent, but keep the number of statements
+		// flat however many colors and mappings that is
+		$colors = [];
 		foreach ($theme['themeColors'] as $id => $theme_color)
 		{
-			$this->db->query('save-theme-color', [
-				':theme' => $theme['id'],
-				':id' => $id,
-				':name' => $theme_color['name'],
-				':palette_color' => $theme_color['palette_color'],
-				':lightness' => $theme_color['lightness'],
-			]);
+			$colors[] = [
+				'id' => $id,
+				'name' => $theme_color['name'],
+				'palette_color' => $theme_color['palette_color'],
+				'lightness' => $theme_color['lightness']
+			];
 		}
 
+		if ($colors)
+		{
+			$this->db->withTempTable('theme_color_edits', $colors, [
+				'id' => 'INTEGER',
+				'name' => 'TEXT',
+				'palette_color' => 'INTEGER',
+				'lightness' => 'REAL'
+			], fn() => $this->db->query('save-theme-colors', $theme['id']));
+		}
+
+		$mappings = [];
 		foreach ($theme['mappings'] as $id => $mapping)
 		{
-			$this->db->query('map-color', [
-				':theme' => $theme['id'],
-				':id' => $id,
-				':theme_color' => $mapping['theme_color']
-			]);
+			$mappings[] = [
+				'id' => $id,
+				'theme_color' => $mapping['theme_color']
+			];
 		}
+
+		if ($mappings)
+		{
+			$this->db->withTempTable('theme_color_map_edits', $mappings, [
+				'id' => 'INTEGER',
+				'theme_color' => 'INTEGER'
+			], fn() => $this->db->query('map-colors', $theme['id']));
+		}
+
+		$this->invalidateThemeCss();
 	}
 
 	public function changeThemePalette(int $theme_id, int $palette_id): void
@@ -244,6 +354,7 @@ class ColorDatabase
 			':palette' => $palette_id
 		]);
 		$this->db->query('reset-theme-color', $theme_id);
+		$this->invalidateThemeCss();
 	}
 
 	public function createThemeColor(int $theme_id): array
@@ -257,6 +368,7 @@ class ColorDatabase
 	{
 		$this->db->query('delete-theme-color', $theme_color_id);
 		$this->db->query('clear-theme-color-mappings', $theme_color_id);
+		$this->invalidateThemeCss();
 	}
 
 	public function createColorMapping(int $theme_id, string $app, string $app_color): array
@@ -279,6 +391,8 @@ class ColorDatabase
 			':color_name' => $app_color,
 			':sys_color' => $color->default()
 		]);
+
+		$this->invalidateThemeCss();
 	}
 
 	public function removeAppColor(string $app, string $app_color): void
@@ -287,6 +401,8 @@ class ColorDatabase
 			':app' => $app,
 			':color_name' => $app_color
 		]);
+
+		$this->invalidateThemeCss();
 	}
 
 	public function appColorNames(string $app): array
@@ -322,11 +438,46 @@ class ColorDatabase
 			':name' => "active-$type-theme",
 			':value' => $theme_id
 		]);
+
+		$this->invalidateThemeCss();
 	}
 
 	public function deactivateTheme(int $theme_id): void
 	{
 		$this->db->query('deactivate-theme', $theme_id);
+		$this->invalidateThemeCss();
+	}
+
+	// Changes whenever anything that theme.css is generated from
+	// changes, so it can key cached stylesheets and ETags
+	public function themeCssRevision(): string
+	{
+		return $this->db->queryValue('get-prop', 'theme-css-revision') ?? 'initial';
+	}
+
+	private function invalidateThemeCss(): void
+	{
+		$this->db->query('set-prop', [
+			':name' => 'theme-css-revision',
+			':value' => \bin2hex(\random_bytes(8))
+		]);
+
+		$this->db->query('delete-prop', 'site-theme-css-hash');
+	}
+
+	// content hash of the combined stylesheet for the current revision,
+	// or null if it hasn't been generated since the last change
+	public function siteThemeCssHash(): ?string
+	{
+		return $this->db->queryValue('get-prop', 'site-theme-css-hash');
+	}
+
+	public function saveSiteThemeCssHash(string $revision, string $hash): void
+	{
+		$this->db->query('set-site-theme-css-hash', [
+			':revision' => $revision,
+			':hash' => $hash
+		]);
 	}
 
 	// only names and ids - no deep loading
@@ -10,6 +10,34 @@ abstract class Config
 	abstract public function siteName(): string;
 	abstract public function landingPage(RespondArg $arg): mixed;
 
+	// Authenticate most requests from a short lived signed cookie
+	// instead of looking up the login token in security.db
+	public function signedSessions(): bool
+	{
+		return false;
+	}
+
+	// Link one stylesheet with every app's theme colors, named by a hash
+	// of its contents and cached forever, instead of a theme.css per app
+	public function combinedThemeCss(): bool
+	{
+		return false;
+	}
+
+	// 'X-Sendfile' or 'X-Accel-Redirect' to have the web server send
+	// static files instead of php
+	public function staticSendfileHeader(): ?string
+	{
+		return null;
+	}
+
+	// Prepended to the absolute file path in the sendfile header, for
+	// example an nginx internal location for X-Accel-Redirect
+	public function staticSendfilePrefix(): string
+	{
+		return '';
+	}
+
 	static public function load(?string $path = null)
 	{
 		$path = $path ?? $_SERVER['SITE_CONFIG_PATH'];
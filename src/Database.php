@@ -11,6 +11,18 @@ enum TransactionType
 
 class Database
 {
+	// connections shared by every caller that opens the same file
+	// during this request (php resets statics between requests)
+	private static array $shared = [];
+
+	// prepared statements for named queries, reset before reuse
+	private array $statements = [];
+
+	// named queries whose cached statement has a result still being read
+	private array $busy = [];
+
+	private ?SqlRegistry $queries = null;
+
 	public function __construct(
 		private \SQLite3 $db,
 		private ?string $query_dir = null
@@ -20,9 +32,55 @@ class Database
 			throw new \Exception("php >= 7.0.7 needed for sqlite3 bindValue type inference");
 	}
 
+	public static function open(string $path): Database
+	{
+		if ($path === ':memory:')
+			return new Database(new \SQLite3($path));
+
+		if (!isset(self::$shared[$path]))
+		{
+			$db = new \SQLite3($path);
+			$db->busyTimeout(5000);
+			$db->exec('PRAGMA journal_mode=WAL');
+			$db->exec('PRAGMA synchronous=NORMAL');
+			self::$shared[$path] = new Database($db);
+		}
+
+		return self::$shared[$path];
+	}
+
+	// for long running processes that need to see files replaced
+	// underneath them
+	public static function closeShared(): void
+	{
+		foreach (self::$shared as $db)
+			$db->close();
+
+		self::$shared = [];
+	}
+
+	public function close(): void
+	{
+		foreach ($this->statements as $stmt)
+			$stmt->close();
+
+		$this->statements = [];
+		$this->busy = [];
+		$this->db->close();
+	}
+
+	// A partially read result keeps its statement's read snapshot
+	// open, which would make a later write transaction fail
+	private function resetStatements(): void
+	{
+		foreach ($this->statements as $stmt)
+			$stmt->reset();
+	}
+
 	public function mountNamedQueries(string $query_dir): void
 	{
 		$this->query_dir = $query_dir;
+		$this->queries = null;
 	}
 
 	public function attach(string $name, string $path): void
@@ -38,6 +96,7 @@ class Database
 	public function lock(TransactionType $type = TransactionType::Immediate): bool
 	{
 		$typeStr = self::transactionType($type);
+		$this->resetStatements();
 		$this->db->exec("BEGIN $typeStr TRANSACTION");
 		return $this->db->lastErrorCode() === 0;
 	}
@@ -47,6 +106,13 @@ class Database
 		$this->db->exec('COMMIT TRANSACTION');
 	}
 
+	// end the transaction from lock() without keeping its changes
+	public function rollback(): void
+	{
+		$this->resetStatements();
+		$this->db->exec('ROLLBACK TRANSACTION');
+	}
+
 	public function lastInsertRowID(): int
 	{
 		return $this->db->lastInsertRowID();
@@ -66,7 +132,8 @@ class Database
 
 	private function loadSql(string $sql): string
 	{
-		return file_get_contents("{$this->query_dir}/$sql.sql");
+		$this->queries ??= SqlRegistry::forDir($this->query_dir);
+		return $this->queries->get($sql);
 	}
 
 	private static function isIdentifier(string $id): bool
@@ -105,7 +172,7 @@ class Database
 		if (\count($table) < 1)
 			throw new \Exception("Failed to create table '$name': expected \$table to have at least one row");
 
-		$$types ??= self::inferColumnTypes($table[0]);
+		$types ??= self::inferColumnTypes($table[0]);
 
 		if (!self::isIdentifier($name))
 			throw new \Exception("Failed to create table '$name': invalid table name. table names must start with a letter and only use letters, underscores, or numbers");
@@ -163,11 +230,27 @@ class Database
 		}
 	}
 
+	// $fn runs with temp.$name holding $table, which is dropped after
+	public function withTempTable(string $name, array $table, ?array $types, callable $fn): mixed
+	{
+		$this->createTempTable($name, $table, $types);
+		try
+		{
+			return $fn();
+		}
+		finally
+		{
+			$this->dropTempTable($name);
+		}
+	}
+
 	public function dropTempTable(string $name): void
 	{
 		if (!self::isIdentifier($name))
 			throw new \Exception("Failed to drop table '$name': invalid table name");
 
+		$this->resetStatements();
+
 		if (!$this->db->exec("DROP TABLE temp.$name;"))
 		{
 			$this->throwSqlError("Failed to drop table '$name'");
@@ -196,6 +279,58 @@ class Database
 		throw new \Exception("failed to prepare statement '$sql'");
 	}
 
+	// Apply the numbered scripts in $dir (001-name.sql, ...) under the
+	// mounted query directory that are newer than PRAGMA user_version
+	public function migrate(string $dir): ?string
+	{
+		$version = $this->db->querySingle('PRAGMA user_version');
+		$scripts = \glob("{$this->query_dir}/$dir/*.sql") ?: [];
+		\sort($scripts);
+
+		foreach ($scripts as $script)
+		{
+			$name = \basename($script, '.sql');
+			$target = \intval($name);
+			if ($target <= $version)
+				continue;
+
+			// a script and its version bump apply together or not at all
+			$this->db->exec('SAVEPOINT migrate');
+			if (!$this->db->exec($this->loadSql("$dir/$name"))
+				|| !$this->db->exec("PRAGMA user_version = $target"))
+			{
+				$err = "Migration '$dir/$name' failed: {$this->db->lastErrorMsg()}";
+				$this->db->exec('ROLLBACK TO migrate');
+				$this->db->exec('RELEASE migrate');
+				return $err;
+			}
+
+			$this->db->exec('RELEASE migrate');
+			$version = $target;
+		}
+
+		return null;
+	}
+
+	// Fingerprint of what installed this database (see
+	// Server::initializeSystem), or null if it predates fingerprints.
+	// Needs a props table and the get-prop/set-prop named queries.
+	public function installedFingerprint(): ?string
+	{
+		if (!$this->queryValue('table-exists', 'props'))
+			return null;
+
+		return $this->queryValue('get-prop', 'install-fingerprint');
+	}
+
+	public function saveInstalledFingerprint(string $fingerprint): void
+	{
+		$this->query('set-prop', [
+			':name' => 'install-fingerprint',
+			':value' => $fingerprint
+		]);
+	}
+
 	public function exec(string $sql): bool
 	{
 		if (!$this->db->exec($this->loadSql($sql)))
@@ -214,19 +349,30 @@ class Database
 		return $result;
 	}
 
+	// Reuses the named query's cached statement unless a result from it
+	// is still being read, in which case this one gets its own. The
+	// cached statement is reset as soon as its result is fully read or
+	// dropped so it doesn't hold a read snapshot open.
 	private function tryQuery(string $sql, mixed $params): ?QueryResult
 	{
-		$query = $this->loadSql($sql);
+		$stmt = $this->statements[$sql] ?? null;
+		$cached = !isset($this->busy[$sql]);
 
-		if (is_null($params))
+		if ($stmt && $cached)
 		{
-			return QueryResult::from($this->db->query($query));
+			$stmt->reset();
+			$stmt->clear();
 		}
-
-		$stmt = $this->db->prepare($query);
-		if (!$stmt)
+		else
 		{
-			throw new \Exception("Failed to prepare: $sql");
+			$stmt = $this->db->prepare($this->loadSql($sql));
+			if (!$stmt)
+			{
+				throw new \Exception("Failed to prepare: $sql");
+			}
+
+			if ($cached)
+				$this->statements[$sql] = $stmt;
 		}
 
 		if (is_scalar($params))
@@ -251,7 +397,19 @@ class Database
 			}
 		}
 
-		return QueryResult::from($stmt->execute());
+		$result = $stmt->execute();
+		if (!$result || !$cached)
+			return QueryResult::from($result);
+
+		$this->busy[$sql] = true;
+		return new QueryResult($result, function() use ($sql, $stmt) {
+			// close() may have already finalized the statement
+			if (!isset($this->busy[$sql]))
+				return;
+
+			unset($this->busy[$sql]);
+			$stmt->reset();
+		});
 	}
 
 	// query a single row that may or may not exist
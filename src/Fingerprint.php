@@ -0,0 +1,64 @@
+<?php
+
+namespace Gulachek\Bassline;
+
+// Hashes of what an install step reads, stored next to what the step
+// wrote so init can tell the step has nothing to do.
+class Fingerprint
+{
+	// sha256 of any json encodable values. Throws rather than hashing
+	// json_encode()'s false for invalid utf-8, which would make every
+	// fingerprint match.
+	public static function of(mixed ...$parts): string
+	{
+		return \hash('sha256', \json_encode($parts, JSON_THROW_ON_ERROR));
+	}
+
+	// sha256 of the names and contents of $paths (relative to $root)
+	// and every file under those that are directories. Missing paths
+	// hash as missing.
+	public static function ofFiles(string $root, array $paths): string
+	{
+		$ctx = \hash_init('sha256');
+
+		foreach ($paths as $path)
+		{
+			$abs = "$root/$path";
+			if (\is_file($abs))
+			{
+				self::hashFile($ctx, $path, $abs);
+				continue;
+			}
+
+			if (!\is_dir($abs))
+			{
+				\hash_update($ctx, "missing:$path\n");
+				continue;
+			}
+
+			$files = [];
+			$it = new \RecursiveIteratorIterator(
+				new \RecursiveDirectoryIterator($abs, \FilesystemIterator::SKIP_DOTS)
+			);
+
+			foreach ($it as $file)
+			{
+				if ($file->isFile())
+					$files[] = \substr($file->getPathname(), \strlen($root) + 1);
+			}
+
+			\sort($files);
+			foreach ($files as $file)
+				self::hashFile($ctx, $file, "$root/$file");
+		}
+
+		return \hash_final($ctx);
+	}
+
+	private static function hashFile(\HashContext $ctx, string $name, string $abs): void
+	{
+		\hash_update($ctx, "$name\n");
+		\hash_update_file($ctx, $abs);
+		\hash_update($ctx, "\n");
+	}
+}
@@ -24,7 +24,7 @@ class InstallDatabase
 	public static function fromConfig(Config $config): InstallDatabase
 	{
 		$data_dir = $config->dataDir();
-		return self::fromSqlite3(new \Sqlite3("$data_dir/install.db"));
+		return new InstallDatabase(Database::open("$data_dir/install.db"));
 	}
 
 	public function lock(): bool
@@ -37,11 +37,29 @@ class InstallDatabase
 		$this->db->unlock();
 	}
 
+	public function rollback(): void
+	{
+		$this->db->rollback();
+	}
+
+	public function installedFingerprint(): ?string
+	{
+		return $this->db->installedFingerprint();
+	}
+
+	public function saveInstalledFingerprint(string $fingerprint): void
+	{
+		$this->db->saveInstalledFingerprint($fingerprint);
+	}
+
 	public function installToVersion(array $apps): ?string
 	{
 		if ($err = $this->initReentrant())
 			return $err;
 
+		if ($err = $this->db->migrate('migrate/install'))
+			return $err;
+
 		$this->db->exec('install/temp-src-code-apps');
 		$stmt = $this->db->prepare('insert-src-code-app');
 
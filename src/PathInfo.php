@@ -2,26 +2,62 @@
 
 namespace Gulachek\Bassline;
 
+// A path is a view (offset and end) into a component array that
+// child(), dir() and slice() share with the path they came from, so
+// walking down a request path doesn't split or join strings. The
+// string forms and \pathinfo() parts are computed on first use.
 class PathInfo
 {
 	private $is_dir;
-	private $path;
-	private $info;
 	private $components;
+	private $offset = 0;
+	private $end;
+
+	// string this path was created from, if any
+	private $raw;
+
+	private $path = null;
+	private $info = null;
 
 	public function __construct($path)
 	{
-		$this->info = \pathinfo($path);
-
 		$this->components = [];
 		foreach (\explode('/', $path) as $piece) {
 			if (!empty($piece))
-				\array_push($this->components, $piece);
+				$this->components[] = $piece;
 		}
 
+		$this->end = \count($this->components);
 		$this->is_dir = \str_ends_with($path, '/');
+		$this->raw = $path;
+	}
 
-		$this->path = '/' . \implode('/', $this->components);
+	private function view(int $offset, int $end): PathInfo
+	{
+		$view = clone $this;
+		$view->offset = $offset;
+		$view->end = $end;
+		$view->is_dir = false;
+		$view->raw = null;
+		$view->path = null;
+		$view->info = null;
+		return $view;
+	}
+
+	private function components(): array
+	{
+		if ($this->offset === 0 && $this->end === \count($this->components))
+			return $this->components;
+
+		return \array_slice($this->components, $this->offset, $this->count());
+	}
+
+	private function info(): array
+	{
+		// derived paths used to be constructed from their components
+		// joined without a leading '/'
+		$this->info ??= \pathinfo($this->raw ?? \implode('/', $this->components()));
+		return $this->info;
 	}
 
 	public function isDir()
@@ -31,37 +67,38 @@ class PathInfo
 
 	public function path()
 	{
+		$this->path ??= '/' . \implode('/', $this->components());
 		return $this->path;
 	}
 
 	public function extension()
 	{
-		return $this->info['extension'];
+		return $this->info()['extension'] ?? null;
 	}
 
 	public function dirname()
 	{
-		return $this->info['dirname'];
+		return $this->info()['dirname'];
 	}
 
 	public function basename()
 	{
-		return $this->info['basename'];
+		return $this->info()['basename'];
 	}
 
 	public function filename()
 	{
-		return $this->info['filename'];
+		return $this->info()['filename'];
 	}
 
 	public function count()
 	{
-		return \count($this->components);
+		return $this->end - $this->offset;
 	}
 
 	public function isRoot()
 	{
-		return !$this->count();
+		return $this->end === $this->offset;
 	}
 
 	public function at($i)
@@ -70,9 +107,9 @@ class PathInfo
 			if ($i >= $this->count())
 				throw new \Exception("Path component index out of bounds: $i");
 
-			return $this->components[$i];
+			return $this->components[$this->offset + $i];
 		} else
-			return $this->components[$this->count() + $i];
+			return $this->components[$this->end + $i];
 	}
 
 	public function child(): ?PathInfo
@@ -81,8 +118,13 @@ class PathInfo
 			return null;
 		}
 
-		$child_components = \array_slice($this->components, 1);
-		return new PathInfo(\implode('/', $child_components));
+		return $this->view($this->offset + 1, $this->end);
+	}
+
+	// path without its first $offset components
+	public function slice(int $offset): PathInfo
+	{
+		return $this->view(\min($this->offset + $offset, $this->end), $this->end);
 	}
 
 	public function dir(): PathInfo
@@ -90,13 +132,12 @@ class PathInfo
 		if ($this->isRoot())
 			return $this;
 
-		$components = \array_slice($this->components, 0, \count($this->components) - 1);
-		return new PathInfo(\implode('/', $components));
+		return $this->view($this->offset, $this->end - 1);
 	}
 
 	public function concat(string $sub): PathInfo
 	{
-		$pieces = \array_slice($this->components, 0);
+		$pieces = $this->components();
 		foreach (\explode('/', $sub) as $piece) {
 			if (empty($piece))
 				continue;
@@ -106,10 +147,12 @@ class PathInfo
 				continue;
 			}
 
-			\array_push($pieces, $piece);
+			$pieces[] = $piece;
 		}
 
-		return new PathInfo(\implode('/', $pieces));
+		$cat = $this->view(0, \count($pieces));
+		$cat->components = $pieces;
+		return $cat;
 	}
 
 	public static function parseURI(string $uri): PathInfo
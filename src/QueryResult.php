@@ -4,12 +4,31 @@ namespace Gulachek\Bassline;
 
 class QueryResult
 {
+	private bool $finished = false;
+
+	// $done runs once every row has been read or the result is dropped
 	public function __construct(
-		private \SQLite3Result $result
+		private \SQLite3Result $result,
+		private ?\Closure $done = null
 	)
 	{
 	}
 
+	public function __destruct()
+	{
+		$this->finish();
+	}
+
+	private function finish(): void
+	{
+		if ($this->finished)
+			return;
+
+		$this->finished = true;
+		if ($this->done)
+			($this->done)();
+	}
+
 	public static function from(\SQLite3Result|false $result): ?QueryResult
 	{
 		if (!$result)
@@ -18,12 +37,18 @@ class QueryResult
 		return new QueryResult($result);
 	}
 
+	// rows can only be read once since the statement is reused after
 	public function rows(int $mode = SQLITE3_ASSOC): \Generator
 	{
+		if ($this->finished)
+			return;
+
 		while ($row = $this->result->fetchArray($mode))
 		{
 			yield $row;
 		}
+
+		$this->finish();
 	}
 
 	// assume there exists an identifying column in query result
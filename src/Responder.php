@@ -38,12 +38,17 @@ class RespondArg
 {
 	private UriFormatter $uri;
 
+	// user id => capabilities, shared by every RespondArg of the
+	// request since render() makes a new one per delegate
+	private static array $capabilities = [];
+
 	public function __construct(
 		private readonly string $app_key,
 		public readonly PathInfo $path,
 		private readonly ?array $user,
 		private readonly Config $config,
-		private readonly PathInfo $request_path
+		private readonly PathInfo $request_path,
+		private readonly ShellApp $shell
 	)
 	{
 		$this->uri = new UriFormatter($app_key, $request_path);
@@ -87,12 +92,21 @@ class RespondArg
 			return true;
 
 		$app = $app ?? $this->app_key;
-		$db = SecurityDatabase::fromConfig($this->config);
+		$caps = $this->user['capabilities'] ?? $this->loadCapabilities();
+		return isset($caps[$app][$cap]);
+	}
 
-		// should cache these
-		$caps = $db->loadUserAppCapabilities($this->user['id'], $app);
+	// users that didn't come from getLoggedInUser
+	private function loadCapabilities(): array
+	{
+		$id = $this->user['id'];
+		if (!isset(self::$capabilities[$id]))
+		{
+			$db = SecurityDatabase::fromConfig($this->config);
+			self::$capabilities[$id] = $db->loadUserCapabilities($id);
+		}
 
-		return in_array($cap, $caps);
+		return self::$capabilities[$id];
 	}
 
 	public function renderPage(
@@ -140,6 +154,7 @@ class RespondArg
 		}
 
 		$APP = $this->app_key;
+		$THEME_STYLESHEETS = $this->shell->themeStylesheets($this->app_key);
 		$SITE_NAME = $this->config->siteName();
 		$APPS = $this->config->apps();
 		$SHOW_ADMIN_LINK =
@@ -150,17 +165,6 @@ class RespondArg
 		return null;
 	}
 
-	private function child(): RespondArg
-	{
-		return new RespondArg(
-			$this->app_key,
-			$this->path->child(),
-			$this->user,
-			$this->config,
-			$this->request_path
-		);
-	}
-
 	// absolute to app
 	public function uriAbs(
 		string $path,
@@ -188,29 +192,10 @@ class RespondArg
 		return $this->uri->cur($query);
 	}
 
+	// See RouteTable for the shape of $routes
 	public function route(array $routes): ResponderDelegate
 	{
-		$not_found = new ResponderDelegate(new NotFound(), null);
-
-		if ($this->path->isRoot())
-		{
-			if (isset($routes['.']))
-				return Responder::delegateTo($routes['.']);
-			else
-				return $not_found;
-		}
-
-		$item = $routes[$this->path->at(0)] ?? null;
-		if (!$item)
-			return $not_found;
-
-		if (is_array($item))
-			return $this->child()->route($item);
-
-		if (!($item instanceof Responder))
-			throw new \Exception('route: items must be arrays or Responder objects');
-
-		return Responder::delegateTo($item, $this->path->child());
+		return (new RouteTable($routes))->dispatch($this->path);
 	}
 
 	public function parseBody(mixed $class): mixed
@@ -0,0 +1,62 @@
+<?php
+
+namespace Gulachek\Bassline;
+
+// Nested route arrays (the same shape RespondArg::route takes) walked
+// one level per path component without a RespondArg or PathInfo per
+// level. Only the levels along the matched path are looked at. Items
+// may be closures returning the Responder (or a nested route array)
+// so handlers are only constructed for the matched route.
+class RouteTable
+{
+	public function __construct(
+		private array $routes
+	)
+	{
+	}
+
+	private static function resolve(mixed $item): mixed
+	{
+		if ($item instanceof \Closure)
+			$item = $item();
+
+		if (!(\is_array($item) || $item instanceof Responder))
+			throw new \Exception('route: items must be arrays or Responder objects');
+
+		return $item;
+	}
+
+	public function dispatch(PathInfo $path): ResponderDelegate
+	{
+		$routes = $this->routes;
+		$n = $path->count();
+
+		for ($i = 0; $i < $n; ++$i)
+		{
+			$key = $path->at($i);
+
+			// '.' names the index of a level, not a path component
+			$item = $key === '.' ? null : ($routes[$key] ?? null);
+			if (!$item)
+				return new ResponderDelegate(new NotFound(), null);
+
+			$item = self::resolve($item);
+			if (\is_array($item))
+			{
+				$routes = $item;
+				continue;
+			}
+
+			return Responder::delegateTo($item, $path->slice($i + 1));
+		}
+
+		if (!isset($routes['.']))
+			return new ResponderDelegate(new NotFound(), null);
+
+		$item = self::resolve($routes['.']);
+		if (\is_array($item))
+			return (new RouteTable($item))->dispatch(new PathInfo(''));
+
+		return Responder::delegateTo($item);
+	}
+}
@@ -4,6 +4,10 @@ namespace Gulachek\Bassline;
 
 class SRGB
 {
+	// lightness steps in a shade table, matching the theme editor's
+	// 0.01 slider step
+	const SHADE_STEPS = 100;
+
 	public function __construct(
 		private readonly int $r,
 		private readonly int $g,
@@ -39,14 +43,7 @@ class SRGB
 		if (!preg_match('/^#[0-9a-f]{6}$/', $hex))
 			throw new \Exception('Invalid hex string');
 
-		$rgb = [0, 0, 0];
-		for ($i = 0; $i < 3; ++$i)
-		{
-			$channel_hex = substr($hex, 1 + 2*$i, 2);
-			$rgb[$i] = ord(hex2bin($channel_hex));
-		}
-
-		return self::fromRGB($rgb);
+		return self::fromRGB(sscanf($hex, '#%2x%2x%2x'));
 	}
 
 	public function toHex(): string
@@ -65,8 +62,11 @@ class SRGB
 		if (count($hsl) !== 3)
 			throw new \Exception('Invalid hsl array');
 
-		list($h, $s, $l) = $hsl;
+		return self::fromRGB(self::hslToRGB(...$hsl));
+	}
 
+	private static function hslToRGB(float $h, float $s, float $l): array
+	{
 		if ($h < 0 || $h >= 360)
 			throw new \Exception("h out of range: $h");
 
@@ -106,7 +106,7 @@ class SRGB
 			return $b;
 		};
 
-		return self::fromRGB(array_map(fn($x) => $to_byte($x + $m), $norm));
+		return array_map(fn($x) => (int)$to_byte($x + $m), $norm);
 	}
 
 	// https://www.rapidtables.com/convert/color/rgb-to-hsl.html
@@ -163,6 +163,49 @@ class SRGB
 		return [$h, $s, $l];
 	}
 
+	// Every lightness step of the hue and saturation of $hex, packed as
+	// SHADE_STEPS + 1 'rrggbb' strings so a shade is one substr
+	public static function shadeTable(string $hex): string
+	{
+		list($h, $s) = self::fromHex($hex)->toHSL();
+
+		$table = '';
+		for ($i = 0; $i <= self::SHADE_STEPS; ++$i)
+		{
+			list($r, $g, $b) = self::hslToRGB($h, $s, $i / self::SHADE_STEPS);
+			$table .= \sprintf('%02x%02x%02x', $r, $g, $b);
+		}
+
+		return $table;
+	}
+
+	// id => shadeTable() for each id => hex
+	public static function shadeTables(array $hexes): array
+	{
+		return \array_map(self::shadeTable(...), $hexes);
+	}
+
+	// '#rrggbb' of $lightness from a shadeTable(), or null if the
+	// lightness isn't one of its steps
+	public static function lookupShade(?string $table, float $lightness): ?string
+	{
+		if (\is_null($table))
+			return null;
+
+		$i = (int)\round($lightness * self::SHADE_STEPS);
+		if ($i / self::SHADE_STEPS != $lightness || $i < 0 || $i > self::SHADE_STEPS)
+			return null;
+
+		return '#' . \substr($table, 6 * $i, 6);
+	}
+
+	// '#rrggbb' of $hex with its lightness replaced
+	public static function shade(string $hex, float $lightness): string
+	{
+		list($h, $s) = self::fromHex($hex)->toHSL();
+		return self::fromHSL([$h, $s, $lightness])->toHex();
+	}
+
 	public function isEqualTo(SRGB $other): bool
 	{
 		return $this->r === $other->r
@@ -4,8 +4,14 @@ namespace Gulachek\Bassline;
 
 class SecurityDatabase
 {
+	const CAPABILITY_CACHE_TTL = 300;
+
+	private bool $capabilities_changed = false;
+
 	public function __construct(
-		private Database $db
+		private Database $db,
+		private ?string $cache_prefix = null,
+		private ?Config $config = null
 	) {
 		$this->db->mountNamedQueries(__DIR__ . '/../sql');
 	}
@@ -13,7 +19,7 @@ class SecurityDatabase
 	static function fromConfig(Config $config): SecurityDatabase
 	{
 		$path = "{$config->dataDir()}/security.db";
-		return new SecurityDatabase(new Database(new \Sqlite3($path)));
+		return new SecurityDatabase(Database::open($path), "bassline:$path", $config);
 	}
 
 	public function lock(): bool
@@ -24,6 +30,19 @@ class SecurityDatabase
 	public function unlock(): void
 	{
 		$this->db->unlock();
+
+		// readers may have cached the old capabilities before commit
+		if ($this->capabilities_changed)
+		{
+			$this->capabilities_changed = false;
+			$this->invalidateCapabilityCache();
+		}
+	}
+
+	public function rollback(): void
+	{
+		$this->db->rollback();
+		$this->capabilities_changed = false;
 	}
 
 	private function createTempSrcCaps(array $apps): void
@@ -44,14 +63,29 @@ class SecurityDatabase
 		$stmt->close();
 	}
 
+	public function installedFingerprint(): ?string
+	{
+		return $this->db->installedFingerprint();
+	}
+
+	public function saveInstalledFingerprint(string $fingerprint): void
+	{
+		$this->db->saveInstalledFingerprint($fingerprint);
+	}
+
 	public function installWithApps(array $apps): ?string
 	{
 		if ($err = $this->initReentrant())
 			return $err;
 
+		if ($err = $this->db->migrate('migrate/security'))
+			return $err;
+
+		$this->db->exec('delete-expired-logins');
 		$this->createTempSrcCaps($apps);
 
 		$this->db->exec('consume-temp-src-caps');
+		$this->capabilitiesChanged();
 		return null;
 	}
 
@@ -98,12 +132,22 @@ class SecurityDatabase
 	// return the username and user ID for a logged in user
 	public function getLoggedInUser(string $token): ?array
 	{
-		$raw_token = base64_decode($token);
-		$id = $this->db->queryValue('get-login-user', $raw_token);
-		if (!$id)
+		$user = $this->db->queryRow('get-login-user', self::tokenHash($token));
+		if (!$user)
 			return null;
 
-		return $this->db->queryRow('load-user', $id);
+		// superusers can do everything without looking anything up
+		$user['capabilities'] = $user['is_superuser']
+			? []
+			: $this->loadUserCapabilities($user['id']);
+
+		return $user;
+	}
+
+	// tokens are only stored hashed
+	private static function tokenHash(string $b64token): string
+	{
+		return \hash('sha256', \base64_decode($b64token), true);
 	}
 
 	public function googleClientId(): ?string
@@ -210,7 +254,7 @@ class SecurityDatabase
 
 		$this->db->query('add-login', [
 			':id' => $user,
-			':token' => $token
+			':token_hash' => \hash('sha256', $token, true)
 		]);
 
 		// after this step, the user will only have 10 most recent logins on system
@@ -219,12 +263,15 @@ class SecurityDatabase
 			':limit' => 10
 		]);
 
+		// logins are rare enough to sweep everyone's expired sessions here
+		$this->db->exec('delete-expired-logins');
+
 		return base64_encode($token);
 	}
 
 	public function logout(string $token): void
 	{
-		$this->db->query('logout', base64_decode($token));
+		$this->db->query('logout', self::tokenHash($token));
 	}
 
 	public function loadUsers(): array
@@ -275,12 +322,70 @@ class SecurityDatabase
 		return $this->db->queryRow('load-user-by-name', $username);
 	}
 
-	public function loadUserAppCapabilities(int $id, string $app): array
+	/*
+	 * All of a user's capabilities in one query, as
+	 * $caps[$app][$name] = true. Cached across requests in APCu
+	 * when it's available.
+	 */
+	public function loadUserCapabilities(int $id): array
+	{
+		$key = $this->capabilityCacheKey($id);
+		if ($key)
+		{
+			$caps = \apcu_fetch($key, $found);
+			if ($found)
+				return $caps;
+		}
+
+		$caps = [];
+		foreach ($this->db->query('load-user-capabilities', $id)->rows() as $row)
+			$caps[$row['app']][$row['name']] = true;
+
+		if ($key)
+			\apcu_store($key, $caps, self::CAPABILITY_CACHE_TTL);
+
+		return $caps;
+	}
+
+	private function capabilityCacheEnabled(): bool
+	{
+		return !\is_null($this->cache_prefix)
+			&& \function_exists('apcu_enabled')
+			&& \apcu_enabled();
+	}
+
+	// cached entries are keyed by a generation that is replaced on
+	// every change, so invalidating never has to find old entries
+	private function capabilityCacheKey(int $id): ?string
 	{
-		return $this->db->query('load-user-app-capabilities', [
-			':user_id' => $id,
-			':app' => $app
-		])->column('name');
+		if (!$this->capabilityCacheEnabled())
+			return null;
+
+		$gen_key = "{$this->cache_prefix}:capabilities";
+		$gen = \apcu_fetch($gen_key);
+		if ($gen === false)
+		{
+			\apcu_add($gen_key, \bin2hex(\random_bytes(8)));
+			$gen = \apcu_fetch($gen_key);
+			if ($gen === false)
+				return null;
+		}
+
+		return "$gen_key:$gen:$id";
+	}
+
+	private function invalidateCapabilityCache(): void
+	{
+		if (!$this->capabilityCacheEnabled())
+			return;
+
+		\apcu_store("{$this->cache_prefix}:capabilities", \bin2hex(\random_bytes(8)));
+	}
+
+	private function capabilitiesChanged(): void
+	{
+		$this->invalidateCapabilityCache();
+		$this->capabilities_changed = true;
 	}
 
 	public function loadGroups(): array
@@ -314,13 +419,24 @@ class SecurityDatabase
 			':save_token' => $group->save_token
 		]);
 
-		$this->db->query('delete-group-capabilities', $group->id);
-		foreach ($group->capabilities as $id) {
-			$this->db->query('add-group-capability', [
-				':group' => $group->id,
-				':cap' => $id
-			]);
+		// only touch the rows that changed
+		$caps = [];
+		foreach ($group->capabilities as $id)
+			$caps[] = ['cap_id' => $id];
+
+		if (!$caps)
+		{
+			$this->db->query('delete-group-capabilities', $group->id);
+		}
+		else
+		{
+			$this->db->withTempTable('group_capability_edits', $caps, ['cap_id' => 'INTEGER'], function() use ($group) {
+				$this->db->query('remove-group-capabilities', $group->id);
+				$this->db->query('add-group-capabilities', [':group' => $group->id]);
+			});
 		}
+
+		$this->capabilitiesChanged();
 	}
 
 	public function createUser(): ?array
@@ -343,6 +459,7 @@ class SecurityDatabase
 	{
 		$id = $user->id;
 		$name = $user->username;
+		$before = $this->db->queryRow('load-user', $id);
 
 		// do not allow changing super user from browser
 		$this->db->query('save-user', [
@@ -353,23 +470,40 @@ class SecurityDatabase
 			':save_token' => $user->save_token
 		]);
 
-		$this->db->query('forget-user-groups', $id);
+		$groups = [];
+		foreach ($user->groups as $gid)
+			$groups[] = ['group_id' => $gid];
 
-		foreach ($user->groups as $gid) {
-			$this->db->query('join-group', [
-				':user' => $id,
-				':group' => $gid
-			]);
+		if (!$groups)
+		{
+			$this->db->query('forget-user-groups', $id);
 		}
+		else
+		{
+			$this->db->withTempTable('user_group_edits', $groups, ['group_id' => 'INTEGER'], function() use ($id) {
+				$this->db->query('leave-groups', $id);
+				$this->db->query('join-groups', [':user' => $id]);
+			});
+		}
+
+		$this->capabilitiesChanged();
+
+		// signed session cookies carry the username and superuser flag
+		$changed = !$before
+			|| $before['username'] !== $name
+			|| \boolval($before['is_superuser']) !== \boolval($user->is_superuser);
+
+		if ($changed && $this->config)
+			SessionCookie::fromConfig($this->config)?->revokeUser($id);
 	}
 
 	function nonceAuthUserId(string $b64token): ?int
 	{
-		$token = base64_decode($b64token);
-		$user_id = $this->db->queryValue('load-nonce', $token);
+		$hash = self::tokenHash($b64token);
+		$user_id = $this->db->queryValue('load-nonce', $hash);
 
 		if (is_int($user_id))
-			$this->db->query('clear-nonce', $token);
+			$this->db->query('clear-nonce', $hash);
 
 		return $user_id;
 	}
@@ -385,12 +519,26 @@ class SecurityDatabase
 		$token = random_bytes(256);
 		$this->db->query('issue-nonce', [
 			':user_id' => $user['id'],
-			':nonce' => $token
+			':nonce_hash' => \hash('sha256', $token, true)
 		]);
 
 		return base64_encode($token);
 	}
 
+	function issueNonces(array $usernames, ?string &$err): ?array
+	{
+		$nonces = [];
+		foreach ($usernames as $username) {
+			$nonce = $this->issueNonce($username, $err);
+			if (!$nonce)
+				return null;
+
+			\array_push($nonces, $nonce);
+		}
+
+		return $nonces;
+	}
+
 	function authPluginEnabled(string $key): bool
 	{
 		return !\is_null($this->db->queryValue('get-prop', "auth-plugin-$key-enabled"));
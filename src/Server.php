@@ -33,96 +33,309 @@ class Server
 		return $apps;
 	}
 
+	// Each database stores a fingerprint of what it was installed from.
+	// Steps whose fingerprint still matches are skipped, and the rest
+	// run in parallel when pcntl is available.
 	public function initializeSystem(): bool
 	{
+		$sql_dir = __DIR__ . '/../sql';
+		$queries = SqlRegistry::scan($sql_dir);
 		$current_apps = $this->allApps();
-		$app_table = [];
-		$has_error = false;
 
-		foreach ($this->allApps() as $key => $app)
+		$versions = [];
+		$colors = [];
+		$capabilities = [];
+		foreach ($current_apps as $key => $app)
 		{
-			\array_push($app_table, [
-				'app' => $key,
-				'version' => $app->version()
-			]);
+			$versions[$key] = "{$app->version()}";
+			$colors[$key] = $app->colors();
+			$capabilities[$key] = $app->capabilities();
 		}
 
-		$installation = InstallDatabase::fromConfig($this->config);
+		$code = Fingerprint::of(
+			$queries,
+			Fingerprint::ofFiles(__DIR__ . '/..', ['src', 'template'])
+		);
+
+		$fingerprints = [
+			'install' => Fingerprint::of($code, $versions),
+			'color' => Fingerprint::of($code, $colors),
+			'security' => Fingerprint::of($code, $capabilities)
+		];
 
-		if (!$installation->lock())
+		$pending = [];
+		foreach ($fingerprints as $step => $fingerprint)
 		{
-			echo "Failed to lock install.db";
-			return false;
+			if ($this->installStepDatabase($step)->installedFingerprint() !== $fingerprint)
+				$pending[$step] = $fingerprint;
 		}
-		try
+
+		if ($pending)
 		{
-			if ($err = $installation->installToVersion($current_apps))
+			$missing = SqlRegistry::missingReferences($sql_dir, __DIR__);
+			foreach ($missing as $name => $file)
 			{
-				echo "Error during app installation: $err\n";
-				return false;
+				echo "Named query '$name' referenced in $file does not exist\n";
 			}
+
+			if ($missing)
+				return false;
 		}
-		finally
+
+		// not fatal since queries can still be read from sql/
+		if (!SqlRegistry::isCompiled($sql_dir, $queries))
 		{
-			$installation->unlock();
+			if ($err = SqlRegistry::compile($sql_dir))
+				echo "Warning: failed to compile named queries: $err\n";
 		}
 
-		$colors = ColorDatabase::fromConfig($this->config);
-		if (!$colors->lock())
+		return $this->runInstallSteps($pending, $current_apps);
+	}
+
+	private function installStepDatabase(string $step): InstallDatabase|ColorDatabase|SecurityDatabase
+	{
+		return match ($step) {
+			'install' => InstallDatabase::fromConfig($this->config),
+			'color' => ColorDatabase::fromConfig($this->config),
+			'security' => SecurityDatabase::fromConfig($this->config)
+		};
+	}
+
+	private function runInstallStep(string $step, array $apps, string $fingerprint): bool
+	{
+		$db = $this->installStepDatabase($step);
+		if (!$db->lock())
 		{
-			echo "Failed to lock colors.db";
+			echo "Failed to lock $step.db\n";
 			return false;
 		}
+		$ok = false;
 		try
 		{
-			if ($err = $colors->installWithApps($current_apps))
+			$err = $step === 'install'
+				? $db->installToVersion($apps)
+				: $db->installWithApps($apps);
+
+			if ($err)
 			{
-				echo "Error during color installation: $err\n";
+				echo "Error during $step installation: $err\n";
 				return false;
 			}
+
+			$db->saveInstalledFingerprint($fingerprint);
+			$ok = true;
+			return true;
 		}
 		finally
 		{
-			$colors->unlock();
+			// a failed step must not leave a partial install behind
+			if ($ok)
+				$db->unlock();
+			else
+				$db->rollback();
 		}
+	}
 
-		$security = SecurityDatabase::fromConfig($this->config);
-		if (!$security->lock())
+	// step => fingerprint
+	private function runInstallSteps(array $steps, array $apps): bool
+	{
+		$can_fork = \function_exists('pcntl_fork') && \function_exists('posix_kill');
+		if (\count($steps) < 2 || !$can_fork)
 		{
-			echo "Failed to lock security.db";
-			return false;
+			foreach ($steps as $step => $fingerprint)
+			{
+				if (!$this->runInstallStep($step, $apps, $fingerprint))
+					return false;
+			}
+
+			return true;
 		}
-		try
+
+		// sqlite connections must not be carried into a child process
+		Database::closeShared();
+
+		$children = [];
+		$unforked = [];
+		foreach ($steps as $step => $fingerprint)
 		{
-			if ($err = $security->installWithApps($current_apps))
+			$pair = \stream_socket_pair(STREAM_PF_UNIX, STREAM_SOCK_STREAM, STREAM_IPPROTO_IP);
+			$pid = $pair ? \pcntl_fork() : -1;
+
+			if ($pid === 0)
+				$this->runInstallStepChild($step, $apps, $fingerprint, $pair[1]);
+
+			if ($pid === -1)
 			{
-				echo "Error during security installation: $err\n";
-				return false;
+				$unforked[$step] = $fingerprint;
+				continue;
 			}
+
+			\fclose($pair[1]);
+			$children[$pid] = [$step, $pair[0]];
 		}
-		finally
+
+		$ok = true;
+		foreach ($children as $pid => list($step, $result))
 		{
-			$security->unlock();
+			$child_ok = \stream_get_contents($result) === '1';
+			\fclose($result);
+			\pcntl_waitpid($pid, $status);
+
+			if (!$child_ok)
+			{
+				echo "Install step '$step' failed\n";
+				$ok = false;
+			}
 		}
 
-		return true;
+		foreach ($unforked as $step => $fingerprint)
+			$ok = $this->runInstallStep($step, $apps, $fingerprint) && $ok;
+
+		return $ok;
+	}
+
+	// Runs in a forked child and never returns. The result goes back
+	// over $result since the child kills itself instead of exiting:
+	// exit() would run destructors for the parent's objects (like apps
+	// holding their own sqlite handles) in this process too.
+	private function runInstallStepChild(
+		string $step,
+		array $apps,
+		string $fingerprint,
+		mixed $result
+	): never
+	{
+		try
+		{
+			$ok = $this->runInstallStep($step, $apps, $fingerprint);
+		}
+		catch (\Throwable $ex)
+		{
+			echo "Error during $step installation: {$ex->getMessage()}\n";
+			$ok = false;
+		}
+
+		\fwrite($result, $ok ? '1' : '0');
+		\fclose($result);
+		\flush();
+
+		\posix_kill(\getmypid(), SIGKILL);
+		exit(1); // not reached
 	}
 
 	public function issueNonce(string $username): bool
+	{
+		return $this->issueNonces([$username]);
+	}
+
+	public function issueNonces(array $usernames): bool
 	{
 		$db = SecurityDatabase::fromConfig($this->config);
-		$nonce = $db->issueNonce($username, $err);
-		if (!$nonce)
+		$nonces = $this->issueNoncesAtomically($db, $usernames, $err);
+		if (!$nonces)
 		{
-			echo "Failed to issue nonce for user '$username'.\n"
+			echo "Failed to issue nonce.\n"
 				. "Reason: $err";
 			return false;
 		}
 
-		echo "$nonce\n";
+		foreach ($nonces as $nonce)
+			echo "$nonce\n";
+
 		return true;
 	}
 
+	// all of the nonces or none of them
+	private function issueNoncesAtomically(SecurityDatabase $db, array $usernames, ?string &$err): ?array
+	{
+		if (!$usernames)
+		{
+			$err = 'No usernames given';
+			return null;
+		}
+
+		if (!$db->lock())
+		{
+			$err = 'Failed to lock security.db';
+			return null;
+		}
+
+		$nonces = null;
+		try
+		{
+			$nonces = $db->issueNonces($usernames, $err);
+		}
+		finally
+		{
+			if (\is_null($nonces))
+				$db->rollback();
+			else
+				$db->unlock();
+		}
+
+		return $nonces;
+	}
+
+	// Long-lived line protocol for test harnesses so that each nonce
+	// doesn't pay for php startup. Each line read from $in is a
+	// whitespace separated list of usernames. Each gets a single line
+	// response, 'ok' followed by a space separated nonce per username
+	// (in order), or 'error <reason>' if no nonces were issued.
+	public function serveNonces($in, $out): void
+	{
+		$db = SecurityDatabase::fromConfig($this->config);
+
+		while (($line = \fgets($in)) !== false)
+		{
+			$usernames = \preg_split('/\s+/', \trim($line), -1, PREG_SPLIT_NO_EMPTY);
+			$err = null;
+			$nonces = $this->issueNoncesAtomically($db, $usernames, $err);
+
+			// keep the response on one line
+			$err = \preg_replace('/\s+/', ' ', \trim($err ?? ''));
+			$response = \is_null($nonces) ? "error $err" : \implode(' ', ['ok', ...$nonces]);
+			\fwrite($out, "$response\n");
+			\fflush($out);
+		}
+	}
+
+	// nginx location blocks serving every app's staticDirs() the same
+	// way serveStaticContent() maps them, so those requests never reach
+	// php. Pass SKIP_STATIC_CONTENT to php so serve.php goes straight to
+	// render().
+	public function nginxStaticConfig(bool $precompressed = false): string
+	{
+		$conf = "# Generated by bin/static_config.php. Do not edit.\n"
+			. "# In the php location: fastcgi_param SKIP_STATIC_CONTENT 1;\n";
+
+		foreach ($this->allApps() as $key => $app)
+		{
+			// shell's static dirs are at the top level
+			$prefix = $app instanceof ShellApp ? '' : "/$key";
+
+			$by_type = [];
+			foreach ($app->mimeTypes() as $ext => $type)
+				$by_type[$type][] = $ext;
+
+			$types = '';
+			foreach ($by_type as $type => $exts)
+				$types .= "\t\t$type " . \implode(' ', $exts) . ";\n";
+
+			foreach ($app->staticDirs() as $uri_dir => $dir)
+			{
+				$dir = \realpath($dir) ?: $dir;
+				$conf .= "\nlocation ^~ $prefix/$uri_dir/ {\n"
+					. "\talias $dir/;\n"
+					. "\ttypes {\n$types\t}\n"
+					. "\tadd_header Cache-Control \"public, no-cache\";\n"
+					. ($precompressed ? "\tgzip_static on;\n" : '')
+					. "}\n";
+			}
+		}
+
+		return $conf;
+	}
+
 	// return true if static content was served, false otherwise
 	// if the URI matches what *should* be a file but it could not be served, an error
 	// response should be emitted and the function should return true
@@ -161,12 +374,12 @@ class Server
 		if (is_file($sys_path))
 		{
 			$types = $app->mimeTypes();
-			$type = $types[$child_path->extension()];
+			$type = $types[$child_path->extension()] ?? null;
 
 			if ($type)
 			{
-				header("Content-Type: $type");
-				echo file_get_contents($sys_path);
+				$file = new StaticFile($sys_path, $type);
+				$file->serve($config);
 			}
 			else
 			{
@@ -202,13 +415,22 @@ class Server
 			return new Redirect("{$path->path()}/");
 
 		$user = null;
-		if (isset($_COOKIE['login']))
+		$session = isset($_COOKIE['login']) ? SessionCookie::fromConfig($this->config) : null;
+
+		if ($session && isset($_COOKIE[SessionCookie::NAME]))
+			$user = $session->decode($_COOKIE[SessionCookie::NAME]);
+
+		if (!$user && isset($_COOKIE['login']))
 		{
 			$db = SecurityDatabase::fromConfig($this->config);
 			$user = $db->getLoggedInUser($_COOKIE['login']);
+
+			if ($user && $session)
+				$session->issue($user);
 		}
 
-		$app = new ShellApp($this->config);
+		$shell = new ShellApp($this->config);
+		$app = $shell;
 		$app_key = 'shell';
 		if (!$app->isShell($path))
 		{
@@ -230,7 +452,7 @@ class Server
 		{
 			$resp = $del->responder;
 			$path = $del->path ?? $path;
-			$arg = new RespondArg($app_key, $path, $user, $this->config, $req_path);
+			$arg = new RespondArg($app_key, $path, $user, $this->config, $req_path, $shell);
 		}
 		while ($del = ResponderDelegate::fromRespondReturnVal($resp->respond($arg)));
 	}
@@ -0,0 +1,194 @@
+<?php
+
+namespace Gulachek\Bassline;
+
+// Short lived HMAC signed cookie carrying the logged in user so that
+// most requests don't need security.db. The long lived 'login' cookie
+// is still checked against the database when this one is missing,
+// expired or revoked, and a fresh one is issued.
+//
+// The key and recent per user revocations live in session.json in the
+// data dir. Revoking a user (on logout or when the user changes)
+// rejects that user's cookies issued before then. Deleting the file
+// replaces the key, which invalidates every outstanding cookie.
+class SessionCookie
+{
+	const NAME = 'session';
+	const LIFETIME_SECONDS = 5 * 60;
+
+	private function __construct(
+		private string $path,
+		private string $key,
+		// user id => ms when the user was revoked
+		private array $revoked = []
+	)
+	{
+	}
+
+	static function fromConfig(Config $config): ?SessionCookie
+	{
+		if (!$config->signedSessions())
+			return null;
+
+		return self::load("{$config->dataDir()}/session.json");
+	}
+
+	private static function load(string $path): ?SessionCookie
+	{
+		$json = @\file_get_contents($path);
+		$state = $json === false ? null : \json_decode($json, true);
+
+		if (\is_array($state) && isset($state['key']))
+		{
+			$key = \base64_decode($state['key']);
+			return new SessionCookie($path, $key, $state['revoked'] ?? []);
+		}
+
+		$session = new SessionCookie($path, \random_bytes(32));
+		return $session->save() ? $session : null;
+	}
+
+	// ms, so a cookie issued right after a revocation isn't rejected
+	private static function now(): int
+	{
+		return (int)(\microtime(true) * 1000);
+	}
+
+	private function save(): bool
+	{
+		$json = \json_encode([
+			'key' => \base64_encode($this->key),
+			'revoked' => $this->revoked
+		]);
+
+		// readers must never see a partially written file
+		$tmp = @\tempnam(\dirname($this->path), '.session');
+		if ($tmp === false)
+			return false;
+
+		// tempnam() is 0600. The key must stay private, so only share
+		// it with the group php-fpm and init run under.
+		\chmod($tmp, 0640);
+
+		if (\file_put_contents($tmp, $json) === false || !\rename($tmp, $this->path))
+		{
+			@\unlink($tmp);
+			return false;
+		}
+
+		return true;
+	}
+
+	// cookies issued to $user_id until now
+	public function revokeUser(int $user_id): void
+	{
+		$this->update(function() use ($user_id) {
+			$now = self::now();
+
+			// cookies issued before these have expired anyway
+			$oldest = $now - 1000 * self::LIFETIME_SECONDS;
+			$this->revoked = \array_filter($this->revoked, fn($t) => $t > $oldest);
+			$this->revoked[$user_id] = $now;
+		});
+	}
+
+	private function update(callable $fn): void
+	{
+		// another process may have revoked since this was loaded
+		$lock = @\fopen("{$this->path}.lock", 'c');
+		if ($lock)
+			\flock($lock, LOCK_EX);
+
+		try
+		{
+			if ($current = self::load($this->path))
+			{
+				$this->key = $current->key;
+				$this->revoked = $current->revoked;
+			}
+
+			$fn();
+			$this->save();
+		}
+		finally
+		{
+			if ($lock)
+				\fclose($lock);
+		}
+	}
+
+	private static function base64url(string $data): string
+	{
+		return \rtrim(\strtr(\base64_encode($data), '+/', '-_'), '=');
+	}
+
+	private function sign(string $payload): string
+	{
+		return self::base64url(\hash_hmac('sha256', $payload, $this->key, true));
+	}
+
+	public function encode(array $user, int $expires): string
+	{
+		$payload = self::base64url(\json_encode([
+			$user['id'],
+			$user['username'],
+			$user['is_superuser'] ? 1 : 0,
+			self::now(),
+			$expires
+		]));
+
+		return "$payload.{$this->sign($payload)}";
+	}
+
+	// user row with id, username and is_superuser, or null if the
+	// cookie is forged, expired or revoked
+	public function decode(string $cookie): ?array
+	{
+		$parts = \explode('.', $cookie);
+		if (\count($parts) !== 2)
+			return null;
+
+		list($payload, $signature) = $parts;
+		if (!\hash_equals($this->sign($payload), $signature))
+			return null;
+
+		$fields = \json_decode(\base64_decode(\strtr($payload, '-_', '+/')), true);
+		if (!\is_array($fields) || \count($fields) !== 5)
+			return null;
+
+		list($id, $username, $is_superuser, $issued, $expires) = $fields;
+		if ($expires <= \time())
+			return null;
+
+		if ($issued <= ($this->revoked[$id] ?? -1))
+			return null;
+
+		return [
+			'id' => $id,
+			'username' => $username,
+			'is_superuser' => $is_superuser
+		];
+	}
+
+	public function issue(array $user): void
+	{
+		$expires = \time() + self::LIFETIME_SECONDS;
+		self::setCookie($this->encode($user, $expires), $expires);
+	}
+
+	public static function clear(): void
+	{
+		self::setCookie('', 1);
+	}
+
+	private static function setCookie(string $value, int $expires): void
+	{
+		\setcookie(self::NAME, $value, [
+			'expires' => $expires,
+			'path' => '/',
+			'secure' => isset($_SERVER['HTTPS']),
+			'httponly' => true,
+			'samesite' => 'Strict'
+		]);
+	}
+}
@@ -34,27 +34,32 @@ class ShellApp extends App
 
 	public function respond(RespondArg $arg): mixed
 	{
-		return $arg->route([
-			'.' => $this->handler('landingPage'),
+		// pages are only constructed (and auth plugins only loaded)
+		// for the route that matches
+		$routes = new RouteTable([
+			'.' => fn() => $this->handler('landingPage'),
 			'login' => [
-				'.' => new LoginPage($this->config, $this->authPlugins()),
-				'attempt' => $this->handler('attemptLogin'),
+				'.' => fn() => new LoginPage($this->config, $this->authPlugins()),
+				'attempt' => fn() => $this->handler('attemptLogin'),
 			],
-			'logout' => $this->handler('logout'),
+			'logout' => fn() => $this->handler('logout'),
 			'site' => [ // use this instead of shell
 				'admin' => [
-					'.' => new AdminPage($this->config),
-					'users' => new UserEditPage($this->config, $this->authPlugins()),
-					'auth_config' => $this->handler('renderAuthConfig'),
-					'groups' => $this->handler('renderGroups'),
-					'color_palette' => $this->handler('renderColorPalette'),
-					'theme' => $this->handler('serveThemeEdit'),
+					'.' => fn() => new AdminPage($this->config),
+					'users' => fn() => new UserEditPage($this->config, $this->authPlugins()),
+					'auth_config' => fn() => $this->handler('renderAuthConfig'),
+					'groups' => fn() => $this->handler('renderGroups'),
+					'color_palette' => fn() => $this->handler('renderColorPalette'),
+					'theme' => fn() => $this->handler('serveThemeEdit'),
 				]
 			],
 			'shell' => [
-				'theme.css' => $this->handler('serveThemeCss'),
+				'theme.css' => fn() => $this->handler('serveThemeCss'),
+				'site-theme' => fn() => $this->handler('serveSiteThemeCss'),
 			]
 		]);
+
+		return $routes->dispatch($arg->path);
 	}
 
 	public function landingPage(RespondArg $arg): mixed
@@ -198,12 +203,16 @@ class ShellApp extends App
 				'httponly' => true,
 				'samesite' => 'Strict'
 			]);
+
+			$session = SessionCookie::fromConfig($this->config);
+			if ($session && ($user = $db->loadUser($user_id)))
+				$session->issue($user);
 		}
 
 		return new Redirect($redir);
 	}
 
-	public function logout()
+	public function logout(RespondArg $arg)
 	{
 		header('Cache-Control: no-store');
 
@@ -213,6 +222,16 @@ class ShellApp extends App
 			$db->logout($_COOKIE['login']);
 		}
 
+		// other copies of the signed cookie would otherwise
+		// outlive the login they came from
+		if ($session = SessionCookie::fromConfig($this->config))
+		{
+			if ($arg->isLoggedIn())
+				$session->revokeUser($arg->uid());
+
+			SessionCookie::clear();
+		}
+
 		return new Redirect('/');
 	}
 
@@ -230,6 +249,12 @@ class ShellApp extends App
 		return $by_name;
 	}
 
+	private static function paletteShade(array $palette_color, float $lightness): string
+	{
+		return SRGB::lookupShade($palette_color['shades'] ?? null, $lightness)
+			?? SRGB::shade($palette_color['hex'], $lightness);
+	}
+
 	private static function mapAppThemeColors(?array $theme, string $app_key, array $colors): array
 	{
 		$name_to_css = [];
@@ -249,9 +274,7 @@ class ShellApp extends App
 
 				$palette_color = $theme['palette']['colors']
 					[$theme_color['palette_color']];
-				$srgb_base = SRGB::fromHex($palette_color['hex']);
-				list($h,$s,$l) = $srgb_base->toHSL();
-				$name_to_css[$name] = SRGB::fromHSL([$h,$s, $lightness])->toHex();
+				$name_to_css[$name] = self::paletteShade($palette_color, $lightness);
 			}
 		}
 		else
@@ -284,9 +307,7 @@ class ShellApp extends App
 
 				$palette_color = $theme['palette']['colors']
 					[$theme_color['palette_color']];
-				$srgb_base = SRGB::fromHex($palette_color['hex']);
-				list($h,$s,$l) = $srgb_base->toHSL();
-				$name_to_css[$name] = SRGB::fromHSL([$h,$s, $lightness])->toHex();
+				$name_to_css[$name] = self::paletteShade($palette_color, $lightness);
 			}
 		}
 		else
@@ -320,26 +341,134 @@ class ShellApp extends App
 			return null;
 		}
 
-		$app = $apps[$app_key];
-		$colors = $app->colors();
+		$db = ColorDatabase::fromConfig($this->config);
+		$revision = $db->themeCssRevision();
+		$etag = "\"$revision-$app_key\"";
+
+		header('Content-Type: text/css');
+		header("ETag: $etag");
+		// revalidate every time since the url doesn't change with the theme
+		header('Cache-Control: no-cache');
+
+		if (StaticFile::etagMatches($etag, $_SERVER['HTTP_IF_NONE_MATCH'] ?? null))
+		{
+			http_response_code(304);
+			return null;
+		}
+
+		$cache = ThemeCssCache::fromConfig($this->config);
+		$css = $cache->load($app_key, $revision);
+		if (\is_null($css))
+		{
+			$css = self::renderThemeCss($db, $app_key, $apps[$app_key]->colors());
+			$cache->store($app_key, $revision, $css);
+		}
+
+		echo $css;
+		return null;
+	}
+
+	// stylesheets with the theme colors for pages of $app_key
+	public function themeStylesheets(string $app_key): array
+	{
+		if (!$this->config->combinedThemeCss())
+		{
+			return [
+				'/shell/theme.css?app=shell',
+				"/shell/theme.css?app=$app_key"
+			];
+		}
 
 		$db = ColorDatabase::fromConfig($this->config);
+		$hash = $db->siteThemeCssHash() ?? $this->generateSiteThemeCss($db);
+		return ["/shell/site-theme/$hash.css"];
+	}
 
-		$active_themes = $db->getActiveThemes();
+	// render and cache the combined stylesheet, returning its hash
+	private function generateSiteThemeCss(ColorDatabase $db): string
+	{
+		$revision = $db->themeCssRevision();
+		$cache = ThemeCssCache::fromConfig($this->config);
+		$hash = $cache->storeSite($revision, $this->renderSiteThemeCss($db));
+		$db->saveSiteThemeCssHash($revision, $hash);
+		return $hash;
+	}
 
-		$dark_theme = null;
-		$light_theme = null;
+	public function serveSiteThemeCss(RespondArg $arg)
+	{
+		$file = $arg->path->isRoot() ? '' : $arg->path->at(0);
+		if (!\preg_match('/^([0-9a-f]{16})\.css$/', $file, $m))
+			return new NotFound();
+
+		$hash = $m[1];
+		$cache = ThemeCssCache::fromConfig($this->config);
+		$css = $cache->loadSite($hash);
+
+		if (\is_null($css))
+		{
+			$db = ColorDatabase::fromConfig($this->config);
+			$current = $db->siteThemeCssHash() ?? $this->generateSiteThemeCss($db);
+
+			if ($current !== $hash)
+			{
+				// a page from before the theme changed
+				header('Cache-Control: no-cache');
+				return new Redirect("/shell/site-theme/$current.css", 302);
+			}
+
+			// the current sheet was removed from the cache
+			$this->generateSiteThemeCss($db);
+			$css = $cache->loadSite($hash);
+			if (\is_null($css))
+				return new NotFound();
+		}
 
-		if (\array_key_exists('dark', $active_themes))
+		$etag = "\"$hash\"";
+		header('Content-Type: text/css');
+		header("ETag: $etag");
+		// a new theme gets a new url, so this one never changes
+		header('Cache-Control: public, max-age=31536000, immutable');
+
+		if (StaticFile::etagMatches($etag, $_SERVER['HTTP_IF_NONE_MATCH'] ?? null))
 		{
-			$dark_theme = $db->loadTheme($active_themes['dark']);
+			http_response_code(304);
+			return null;
 		}
 
-		if (\array_key_exists('light', $active_themes))
+		echo $css;
+		return null;
+	}
+
+	private function renderSiteThemeCss(ColorDatabase $db): string
+	{
+		$active_themes = $db->loadActiveThemes();
+		$dark_theme = $active_themes['dark'] ?? null;
+		$light_theme = $active_themes['light'] ?? null;
+
+		$sys_colors = $db->loadSystemColorValues();
+		$DARK_SYS = self::mapSysThemeColors($sys_colors, $dark_theme, isDark: true);
+		$LIGHT_SYS = self::mapSysThemeColors($sys_colors, $light_theme, isDark: false);
+
+		$DARK_APPS = [];
+		$LIGHT_APPS = [];
+		foreach ($this->allApps() as $app_key => $app)
 		{
-			$light_theme = $db->loadTheme($active_themes['light']);
+			$colors = $app->colors();
+			$DARK_APPS[$app_key] = self::mapAppThemeColors($dark_theme, $app_key, $colors);
+			$LIGHT_APPS[$app_key] = self::mapAppThemeColors($light_theme, $app_key, $colors);
 		}
 
+		\ob_start();
+		require (__DIR__ . '/../template/site_theme.css.php');
+		return \ob_get_clean();
+	}
+
+	private static function renderThemeCss(ColorDatabase $db, string $app_key, array $colors): string
+	{
+		$active_themes = $db->loadActiveThemes();
+		$dark_theme = $active_themes['dark'] ?? null;
+		$light_theme = $active_themes['light'] ?? null;
+
 		$sys_colors = $db->loadSystemColorValues();
 		$DARK_SYS = self::mapSysThemeColors($sys_colors, $dark_theme, isDark: true);
 		$LIGHT_SYS = self::mapSysThemeColors($sys_colors, $light_theme, isDark: false);
@@ -347,9 +476,9 @@ class ShellApp extends App
 		$DARK_APP = self::mapAppThemeColors($dark_theme, $app_key, $colors);
 		$LIGHT_APP = self::mapAppThemeColors($light_theme, $app_key, $colors);
 
-		header('Content-Type: text/css');
+		\ob_start();
 		require (__DIR__ . '/../template/theme.css.php');
-		return null;
+		return \ob_get_clean();
 	}
 
 	public function renderGroups(RespondArg $arg): mixed
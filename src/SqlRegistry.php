@@ -0,0 +1,183 @@
+<?php
+
+namespace Gulachek\Bassline;
+
+// Named queries from a sql/ directory. compile() writes every query
+// into one generated php file which opcache keeps in shared memory,
+// so the hot paths don't read a .sql file per query. Without the
+// compiled file, queries are read from disk once per request.
+//
+// The compiled file is ignored (with a warning in the error log) once
+// sql/ or one of its subdirectories is modified after it, which
+// catches added, removed and renamed files and editors that save by
+// replacing the file. Recompile (init.php does this) after editing.
+class SqlRegistry
+{
+	const COMPILED_FILE = 'compiled.php';
+
+	private static array $registries = [];
+
+	private function __construct(
+		private string $dir,
+		private array $queries
+	)
+	{
+	}
+
+	public static function forDir(string $dir): SqlRegistry
+	{
+		if (!isset(self::$registries[$dir]))
+		{
+			$queries = self::loadCompiled($dir);
+			if (\is_null($queries) && \is_file("$dir/" . self::COMPILED_FILE))
+				\error_log("Ignoring stale $dir/" . self::COMPILED_FILE . ', run bin/compile_sql.php');
+
+			self::$registries[$dir] = new SqlRegistry($dir, $queries ?? []);
+		}
+
+		return self::$registries[$dir];
+	}
+
+	// queries from the compiled file, or null if it is missing or older
+	// than the directories it was compiled from
+	private static function loadCompiled(string $dir): ?array
+	{
+		$compiled = "$dir/" . self::COMPILED_FILE;
+		$built = @\filemtime($compiled);
+		if ($built === false)
+			return null;
+
+		$data = include $compiled;
+		if (!\is_array($data) || !isset($data['dirs'], $data['queries']))
+			return null;
+
+		foreach ($data['dirs'] as $sub)
+		{
+			if (@\filemtime("$dir$sub") > $built)
+				return null;
+		}
+
+		return $data['queries'];
+	}
+
+	// $dir and its subdirectories, relative to $dir
+	private static function subdirs(string $dir): array
+	{
+		$dirs = [''];
+		$it = new \RecursiveIteratorIterator(
+			new \RecursiveDirectoryIterator($dir, \FilesystemIterator::SKIP_DOTS),
+			\RecursiveIteratorIterator::SELF_FIRST
+		);
+
+		foreach ($it as $file)
+		{
+			if ($file->isDir())
+				$dirs[] = \substr($file->getPathname(), \strlen($dir));
+		}
+
+		\sort($dirs);
+		return $dirs;
+	}
+
+	public function get(string $name): string
+	{
+		if (isset($this->queries[$name]))
+			return $this->queries[$name];
+
+		$sql = @\file_get_contents("{$this->dir}/$name.sql");
+		if ($sql === false)
+			throw new \Exception("Named query '$name' not found in {$this->dir}");
+
+		return $this->queries[$name] = $sql;
+	}
+
+	// name (relative path without .sql) => sql
+	public static function scan(string $dir): array
+	{
+		$queries = [];
+		$files = new \RecursiveIteratorIterator(
+			new \RecursiveDirectoryIterator($dir, \FilesystemIterator::SKIP_DOTS)
+		);
+
+		foreach ($files as $file)
+		{
+			if ($file->getExtension() !== 'sql')
+				continue;
+
+			$rel = \substr($file->getPathname(), \strlen($dir) + 1);
+			$queries[\substr($rel, 0, -4)] = \file_get_contents($file->getPathname());
+		}
+
+		\ksort($queries);
+		return $queries;
+	}
+
+	// whether compile() already wrote exactly $queries from scan()
+	public static function isCompiled(string $dir, array $queries): bool
+	{
+		return self::loadCompiled($dir) === $queries;
+	}
+
+	public static function compile(string $dir): ?string
+	{
+		$data = [
+			'dirs' => self::subdirs($dir),
+			'queries' => self::scan($dir)
+		];
+
+		$php = "<?php\n\n// Generated from *.sql by SqlRegistry::compile. Do not edit.\n\nreturn "
+			. \var_export($data, true) . ";\n";
+
+		$tmp = @\tempnam($dir, '.compiled');
+		if ($tmp === false)
+			return "Cannot write to '$dir'";
+
+		// tempnam() is 0600, but php-fpm may run as another user
+		\chmod($tmp, 0644);
+
+		if (\file_put_contents($tmp, $php) === false || !\rename($tmp, "$dir/" . self::COMPILED_FILE))
+		{
+			@\unlink($tmp);
+			return "Failed to write '$dir/" . self::COMPILED_FILE . "'";
+		}
+
+		// renaming into $dir just made it newer than the file
+		\touch("$dir/" . self::COMPILED_FILE);
+
+		// a long running process (or this one) may already hold the old queries
+		unset(self::$registries[$dir]);
+		if (\function_exists('opcache_invalidate'))
+			\opcache_invalidate("$dir/" . self::COMPILED_FILE, true);
+
+		return null;
+	}
+
+	// Named queries referenced by string literal in php sources under
+	// $src_dir that don't exist in $dir
+	public static function missingReferences(string $dir, string $src_dir): array
+	{
+		$queries = self::scan($dir);
+		$missing = [];
+
+		$files = new \RecursiveIteratorIterator(
+			new \RecursiveDirectoryIterator($src_dir, \FilesystemIterator::SKIP_DOTS)
+		);
+
+		$pattern = "/->(?:query|queryRow|queryValue|prepare|exec)\(\s*'([a-z0-9\-\/]+)'/";
+
+		foreach ($files as $file)
+		{
+			if ($file->getExtension() !== 'php')
+				continue;
+
+			\preg_match_all($pattern, \file_get_contents($file->getPathname()), $matches);
+			foreach ($matches[1] as $name)
+			{
+				if (!isset($queries[$name]))
+					$missing[$name] = $file->getFilename();
+			}
+		}
+
+		return $missing;
+	}
+}
@@ -0,0 +1,193 @@
+<?php
+
+namespace Gulachek\Bassline;
+
+// Deliver a file from an app's staticDirs(). The web server sends the
+// body when Config::staticSendfileHeader() names X-Sendfile or
+// X-Accel-Redirect. Otherwise php streams it with conditional and
+// single range request support. Precompressed .br/.gz siblings are
+// preferred when the client accepts them.
+class StaticFile
+{
+	const ENCODINGS = [
+		'br' => 'br',
+		'gzip' => 'gz'
+	];
+
+	public function __construct(
+		private string $path,
+		private string $type
+	)
+	{
+	}
+
+	public static function etagMatches(string $etag, ?string $if_none_match): bool
+	{
+		if (!$if_none_match)
+			return false;
+
+		foreach (\explode(',', $if_none_match) as $candidate)
+		{
+			$candidate = \trim($candidate);
+			if ($candidate === '*' || $candidate === $etag || $candidate === "W/$etag")
+				return true;
+		}
+
+		return false;
+	}
+
+	// [content coding or null, path of the file to send]
+	private function negotiateEncoding(?string $accept_encoding): array
+	{
+		if (!$accept_encoding)
+			return [null, $this->path];
+
+		$accepted = [];
+		foreach (\explode(',', $accept_encoding) as $item)
+		{
+			$parts = \explode(';', $item);
+			$coding = \strtolower(\trim($parts[0]));
+			$q = 1.0;
+			foreach (\array_slice($parts, 1) as $param)
+			{
+				if (\preg_match('/^\s*q=([0-9.]+)\s*$/', $param, $m))
+					$q = \floatval($m[1]);
+			}
+
+			$accepted[$coding] = $q;
+		}
+
+		foreach (self::ENCODINGS as $coding => $ext)
+		{
+			$q = $accepted[$coding] ?? $accepted['*'] ?? 0;
+			if ($q > 0 && \is_file("{$this->path}.$ext"))
+				return [$coding, "{$this->path}.$ext"];
+		}
+
+		return [null, $this->path];
+	}
+
+	// [start, end] inclusive, null to send everything, or false if
+	// the range can't be satisfied
+	private static function parseRange(string $range, int $size): array|false|null
+	{
+		if (!\preg_match('/^bytes=(\d*)-(\d*)$/', \trim($range), $m))
+			return null; // multiple or malformed ranges get the whole file
+
+		if ($m[1] === '' && $m[2] === '')
+			return null;
+
+		if ($m[1] === '')
+		{
+			$suffix = \intval($m[2]);
+			if ($suffix === 0)
+				return false;
+
+			return [\max(0, $size - $suffix), $size - 1];
+		}
+
+		$start = \intval($m[1]);
+		$end = $m[2] === '' ? $size - 1 : \min(\intval($m[2]), $size - 1);
+
+		if ($start >= $size || $start > $end)
+			return false;
+
+		return [$start, $end];
+	}
+
+	public function serve(Config $config): void
+	{
+		list($encoding, $path) = $this->negotiateEncoding($_SERVER['HTTP_ACCEPT_ENCODING'] ?? null);
+
+		$stat = @\stat($path);
+		if ($stat === false)
+		{
+			http_response_code(404);
+			header('Content-Type: text/plain');
+			echo 'Not found';
+			return;
+		}
+
+		$size = $stat['size'];
+		$mtime = $stat['mtime'];
+		$etag = \sprintf('"%x-%x%s"', $mtime, $size, $encoding ? "-$encoding" : '');
+		$last_modified = \gmdate('D, d M Y H:i:s', $mtime) . ' GMT';
+
+		header("Content-Type: {$this->type}");
+		header("ETag: $etag");
+		header("Last-Modified: $last_modified");
+		header('Cache-Control: public, no-cache');
+		header('Vary: Accept-Encoding');
+		if ($encoding)
+			header("Content-Encoding: $encoding");
+
+		if (self::notModified($etag, $mtime))
+		{
+			http_response_code(304);
+			return;
+		}
+
+		$sendfile = $config->staticSendfileHeader();
+		if ($sendfile)
+		{
+			// the web server handles ranges and the body from here
+			$prefix = $config->staticSendfilePrefix();
+			header("$sendfile: $prefix$path");
+			return;
+		}
+
+		header('Accept-Ranges: bytes');
+
+		$range = null;
+		$if_range = $_SERVER['HTTP_IF_RANGE'] ?? null;
+		if (isset($_SERVER['HTTP_RANGE']) && (!$if_range || $if_range === $etag))
+			$range = self::parseRange($_SERVER['HTTP_RANGE'], $size);
+
+		if ($range === false)
+		{
+			http_response_code(416);
+			header("Content-Range: bytes */$size");
+			return;
+		}
+
+		list($start, $end) = $range ?? [0, $size - 1];
+		$length = $end - $start + 1;
+
+		if ($range)
+		{
+			http_response_code(206);
+			header("Content-Range: bytes $start-$end/$size");
+		}
+
+		header("Content-Length: $length");
+
+		if (($_SERVER['REQUEST_METHOD'] ?? 'GET') === 'HEAD')
+			return;
+
+		if (!$range)
+		{
+			\readfile($path);
+			return;
+		}
+
+		$in = \fopen($path, 'rb');
+		$out = \fopen('php://output', 'wb');
+		\stream_copy_to_stream($in, $out, $length, $start);
+		\fclose($in);
+		\fclose($out);
+	}
+
+	private static function notModified(string $etag, int $mtime): bool
+	{
+		// If-None-Match takes precedence when both are sent
+		if (isset($_SERVER['HTTP_IF_NONE_MATCH']))
+			return self::etagMatches($etag, $_SERVER['HTTP_IF_NONE_MATCH']);
+
+		$since = $_SERVER['HTTP_IF_MODIFIED_SINCE'] ?? null;
+		if (!$since)
+			return false;
+
+		$since_time = \strtotime($since);
+		return $since_time !== false && $mtime <= $since_time;
+	}
+}
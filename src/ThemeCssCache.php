@@ -0,0 +1,80 @@
+<?php
+
+namespace Gulachek\Bassline;
+
+// Generated theme.css per app, stored in the data dir. Entries are
+// keyed by ColorDatabase::themeCssRevision() so anything that changes
+// a theme makes old entries unreachable instead of needing to delete
+// them.
+class ThemeCssCache
+{
+	public function __construct(
+		private string $dir
+	)
+	{
+	}
+
+	static function fromConfig(Config $config): ThemeCssCache
+	{
+		return new ThemeCssCache("{$config->dataDir()}/theme-css");
+	}
+
+	private function path(string $app, string $revision): string
+	{
+		return "{$this->dir}/$app.$revision.css";
+	}
+
+	public function load(string $app, string $revision): ?string
+	{
+		$css = @\file_get_contents($this->path($app, $revision));
+		return $css === false ? null : $css;
+	}
+
+	// The combined stylesheet for every app is stored as
+	// _site.<revision>.<hash>.css and served by its hash.
+	const SITE = '_site';
+
+	public function loadSite(string $hash): ?string
+	{
+		$files = \glob("{$this->dir}/" . self::SITE . ".*.$hash.css") ?: [];
+		if (!$files)
+			return null;
+
+		$css = @\file_get_contents($files[0]);
+		return $css === false ? null : $css;
+	}
+
+	public function storeSite(string $revision, string $css): string
+	{
+		$hash = \substr(\hash('sha256', $css), 0, 16);
+		$this->store(self::SITE, "$revision.$hash", $css);
+		return $hash;
+	}
+
+	public function store(string $app, string $revision, string $css): void
+	{
+		if (!\is_dir($this->dir))
+			@\mkdir($this->dir, recursive: true);
+
+		$path = $this->path($app, $revision);
+
+		// stale revisions for this app are never read again
+		foreach (\glob("{$this->dir}/$app.*.css") ?: [] as $stale)
+		{
+			if ($stale !== $path)
+				@\unlink($stale);
+		}
+
+		// concurrent requests may render the same revision, so
+		// write under a unique name and atomically move into place
+		$tmp = \tempnam($this->dir, '.theme-css');
+		if ($tmp === false)
+			return;
+
+		// tempnam() is 0600, but other php users serve the same files
+		\chmod($tmp, 0644);
+
+		if (\file_put_contents($tmp, $css) === false || !\rename($tmp, $path))
+			@\unlink($tmp);
+	}
+}
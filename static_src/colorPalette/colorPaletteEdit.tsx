@@ -212,7 +212,13 @@ function reducer(state: IEditState, action: EditAction)
 			}
 			palette.colors.deletedItems = deletedItems;
 
-			savedPalette.colors = request.colors.items;
+			// the request only had what changed
+			savedPalette.colors = {
+				...savedPalette.colors,
+				...request.colors.items
+			};
+			for (const id of request.colors.deletedItems)
+				delete savedPalette.colors[id];
 		}
 
 		isSaving = false;
@@ -304,6 +310,29 @@ function paletteHasChange(edit: IPaletteEdit, saved: IPalette): boolean
 	return false;
 }
 
+// Only send what changed since the last save. The save key identifies
+// the revision the changes apply to.
+function paletteChanges(edit: IPaletteEdit, saved: IPalette): IPaletteEdit
+{
+	const items: JsonMap<IPaletteColor> = {};
+	for (const id in edit.colors.items)
+	{
+		const editColor = edit.colors.items[id];
+		const saveColor = saved.colors[id];
+		if (!saveColor
+			|| editColor.name !== saveColor.name
+			|| editColor.hex !== saveColor.hex)
+		{
+			items[id] = editColor;
+		}
+	}
+
+	return structuredClone({
+		...edit,
+		colors: { ...edit.colors, items }
+	});
+}
+
 interface IPaletteNameProps
 {
 	name: string;
@@ -547,12 +576,12 @@ function Page(props: IPageModel)
 	const onSave = useCallback(async () => {
 		dispatch({ type: 'beginSave' });
 
-		const request = structuredClone(palette);
+		const request = paletteChanges(palette, savedPalette);
 
 		const response = await postJson<ISaveResponse>('./save', { body: request });
 
 		dispatch({ type: 'endSave', response, request });
-	}, [palette]);
+	}, [palette, savedPalette]);
 
 	const fieldsValid = fieldsAreValid(fieldValidity);
 	const shouldSave = hasChange && !errorMsg && fieldsValid;
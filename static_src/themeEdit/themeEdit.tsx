@@ -347,8 +347,18 @@ function reducer(state: IEditState, action: EditAction) {
       }
       theme.themeColors.deletedItems = deletedItems;
 
-      savedTheme.themeColors = request.theme.themeColors.items;
-      savedTheme.mappings = request.theme.mappings;
+      // the request only had what changed
+      savedTheme.themeColors = {
+        ...savedTheme.themeColors,
+        ...request.theme.themeColors.items,
+      };
+      for (const id of request.theme.themeColors.deletedItems)
+        delete savedTheme.themeColors[id];
+
+      savedTheme.mappings = {
+        ...savedTheme.mappings,
+        ...request.theme.mappings,
+      };
     }
 
     isSaving = false;
@@ -462,6 +472,36 @@ function pageHasChange(state: IEditState): boolean {
   return false;
 }
 
+// Only send what changed since the last save. The save key identifies
+// the revision the changes apply to.
+function themeChanges(theme: IThemeEdit, savedTheme: ITheme): IThemeEdit {
+  const items: JsonMap<IThemeColor> = {};
+  for (const id in theme.themeColors.items) {
+    const editColor = theme.themeColors.items[id];
+    const saveColor = savedTheme.themeColors[id];
+    if (
+      !saveColor ||
+      editColor.name !== saveColor.name ||
+      editColor.lightness !== saveColor.lightness ||
+      editColor.palette_color !== saveColor.palette_color
+    )
+      items[id] = editColor;
+  }
+
+  const mappings: JsonMap<IThemeMapping> = {};
+  for (const id in theme.mappings) {
+    const mapping = theme.mappings[id];
+    if (mapping.theme_color !== savedTheme.mappings[id]?.theme_color)
+      mappings[id] = mapping;
+  }
+
+  return structuredClone({
+    ...theme,
+    themeColors: { ...theme.themeColors, items },
+    mappings,
+  });
+}
+
 interface IThemeNameProps {
   name: string;
   field: IInputField;
@@ -1004,12 +1044,12 @@ function Page(props: IPageModel) {
   const onSave = useCallback(async () => {
     dispatch({ type: 'beginSave' });
 
-    const request = { theme: structuredClone(theme), status };
+    const request = { theme: themeChanges(theme, savedTheme), status };
 
     const response = await postJson<ISaveResponse>('./save', { body: request });
 
     dispatch({ type: 'endSave', response, request });
-  }, [theme, status]);
+  }, [theme, savedTheme, status]);
 
   const fieldsValid = fieldsAreValid(fieldValidity);
   const shouldSave = hasChange && !errorMsg && fieldsValid;
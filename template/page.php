@@ -13,7 +13,7 @@ function blLinkItem(string $href, string $text, string $iconPath)
 
 ?>
 <!DOCTYPE html>
-<html>
+<html data-app="<?= text($APP) ?>">
 
 <head>
 	<meta name="viewport" content="width=device-width, initial-scale=1" />
@@ -21,8 +21,9 @@ function blLinkItem(string $href, string $text, string $iconPath)
 
 	<script src="/assets/components.js"></script>
 
-	<link rel="stylesheet" type="text/css" href="/shell/theme.css?app=shell" />
-	<link rel="stylesheet" type="text/css" href="/shell/theme.css?app=<?= text($APP) ?>" />
+	<?php foreach ($THEME_STYLESHEETS as $href) : ?>
+		<link rel="stylesheet" type="text/css" href="<?= text($href) ?>" />
+	<?php endforeach; ?>
 	<link rel="stylesheet" type="text/css" href="/assets/main.css" />
 </head>
 
@@ -0,0 +1,41 @@
+:root {
+	color-scheme: light dark;
+
+<?php foreach ($LIGHT_SYS as $name => $color): ?>
+	--system-theme-<?=$name?>: <?=$color?>;
+<?php endforeach; ?>
+
+<?php foreach ($LIGHT_APPS['shell'] ?? [] as $name => $color): ?>
+	--theme-<?=$name?>: <?=$color?>;
+<?php endforeach; ?>
+}
+<?php foreach ($LIGHT_APPS as $app => $colors): ?>
+<?php if ($app === 'shell' || !$colors) continue; ?>
+
+:root[data-app="<?=$app?>"] {
+<?php foreach ($colors as $name => $color): ?>
+	--theme-<?=$name?>: <?=$color?>;
+<?php endforeach; ?>
+}
+<?php endforeach; ?>
+
+@media (prefers-color-scheme: dark) {
+	:root {
+<?php foreach ($DARK_SYS as $name => $color): ?>
+		--system-theme-<?=$name?>: <?=$color?>;
+<?php endforeach; ?>
+
+<?php foreach ($DARK_APPS['shell'] ?? [] as $name => $color): ?>
+		--theme-<?=$name?>: <?=$color?>;
+<?php endforeach; ?>
+	}
+<?php foreach ($DARK_APPS as $app => $colors): ?>
+<?php if ($app === 'shell' || !$colors) continue; ?>
+
+	:root[data-app="<?=$app?>"] {
+<?php foreach ($colors as $name => $color): ?>
+		--theme-<?=$name?>: <?=$color?>;
+<?php endforeach; ?>
+	}
+<?php endforeach; ?>
+}
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+
+# Load benchmark for the hot endpoints of bin/serve.php
+#
+# Starts the site from test/config.php with php -S, seeds bench users
+# that each own a palette and theme, logs them in with nonces and then
+# has one connection per user loop over a weighted mix of requests.
+# Reports requests per second, latency percentiles and error rates per
+# endpoint and compares them with a saved baseline.
+#
+# Usage: bench.py [-c CONNECTIONS] [-d SECONDS] [--save-baseline]
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse, urlencode
+
+from uilib.server import SiteServer
+from uilib.seeder import Seeder
+from uilib.nonce import NonceIssuer
+
+testDir = Path(__file__).parent
+dataDir = testDir / 'data'
+
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.cookies = dict()
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+    async def _readBody(self, headers):
+        if headers.get('transfer-encoding') == 'chunked':
+            body = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    return body
+                body += chunk[:-2]
+
+        if 'content-length' in headers:
+            return await self.reader.readexactly(int(headers['content-length']))
+
+        return await self.reader.read()
+
+    async def request(self, method, path, body=None, headers={}):
+        # php -S closes after every response, so reconnect as needed
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for name, value in headers.items():
+            lines.append(f"{name}: {value}")
+        if self.cookies:
+            lines.append('Cookie: ' + '; '.join(f"{k}={v}" for k, v in self.cookies.items()))
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + (body or b''))
+        await self.writer.drain()
+
+        head = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+        statusLine, *headerLines = head.split('\r\n')
+        status = int(statusLine.split(' ')[1])
+        headers = dict()
+        for line in headerLines:
+            if not line:
+                continue
+            name, value = line.split(':', 1)
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'set-cookie':
+                cookie = value.split(';', 1)[0]
+                k, v = cookie.split('=', 1)
+                self.cookies[k] = v
+            headers[name] = value
+
+        data = await self._readBody(headers)
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        return status, headers, data
+
+# Everything a bench user needs to post autosaves for their own
+# palette and theme without conflicting with other users
+class BenchUser:
+    def __init__(self, username, palette, colors, theme, themeColor):
+        self.username = username
+        self.palette = palette
+        self.colors = colors
+        self.theme = theme
+        self.themeColor = themeColor
+        self.paletteSaveKey = ''
+        self.themeSaveKey = ''
+        self.saves = 0
+
+def seed(server, n):
+    users = []
+    with Seeder(server.dataDir) as seed:
+        seed.enableAuth(noauth=True)
+        seed.createGroup('bench', [('shell', 'edit_themes')])
+
+        for i in range(n):
+            username = f"bench{i}"
+            seed.createUser(username, 'bench')
+
+            palette = seed.createPalette(f"Bench {i}", {
+                'Red': '#ff0000',
+                'Green': '#00ff00',
+                'Blue': '#0000ff',
+                })
+            colors = {
+                name: seed.paletteColorId(palette, name)
+                for name in ['Red', 'Green', 'Blue']
+                }
+
+            theme = seed.createTheme(f"Bench {i}", palette)
+            themeColor = seed.color.execute(
+                'SELECT id FROM theme_color WHERE theme=? AND system_color IS NULL',
+                (theme,)).fetchone()[0]
+
+            users.append(BenchUser(username, palette, colors, theme, themeColor))
+
+    return users
+
+def _json(status, data):
+    return json.loads(data) if status == 200 else {}
+
+async def savePalette(conn, user):
+    user.saves += 1
+    hexval = f"#{user.saves % 256:02x}0000"
+    body = json.dumps({
+        'id': user.palette,
+        'name': f"Bench palette {user.saves % 2}",
+        'saveKey': user.paletteSaveKey,
+        'colors': {
+            'items': {
+                str(user.colors['Red']): {
+                    'id': user.colors['Red'],
+                    'name': 'Red',
+                    'hex': hexval
+                    }
+                },
+            'newItems': {},
+            'deletedItems': []
+            }
+        }).encode()
+
+    status, headers, data = await conn.request(
+        'POST', '/site/admin/color_palette/save', body,
+        {'Content-Type': 'application/json'})
+    user.paletteSaveKey = _json(status, data).get('newSaveKey', user.paletteSaveKey)
+    return status
+
+async def saveTheme(conn, user):
+    user.saves += 1
+    body = json.dumps({
+        'status': 'inactive',
+        'theme': {
+            'id': user.theme,
+            'name': f"Bench theme {user.saves % 2}",
+            'saveKey': user.themeSaveKey,
+            'themeColors': {
+                'items': {
+                    str(user.themeColor): {
+                        'id': user.themeColor,
+                        'name': 'Bench Color',
+                        'palette_color': user.colors['Green'],
+                        'lightness': (user.saves % 100) / 100
+                        }
+                    },
+                'newItems': {},
+                'deletedItems': []
+                },
+            'mappings': {}
+            }
+        }).encode()
+
+    status, headers, data = await conn.request(
+        'POST', '/site/admin/theme/save', body,
+        {'Content-Type': 'application/json'})
+    user.themeSaveKey = _json(status, data).get('newSaveKey', user.themeSaveKey)
+    return status
+
+def _get(path):
+    async def get(conn, user):
+        status, headers, data = await conn.request('GET', path)
+        return status
+    return get
+
+# (name, weight, request)
+MIX = [
+    ('landing', 3, _get('/')),
+    ('hello', 3, _get('/hello/')),
+    ('theme.css shell', 2, _get('/shell/theme.css?app=shell')),
+    ('theme.css hello', 2, _get('/shell/theme.css?app=hello')),
+    ('assets main.css', 1, _get('/assets/main.css')),
+    ('assets components.js', 1, _get('/assets/components.js')),
+    ('save palette', 1, savePalette),
+    ('save theme', 1, saveTheme),
+]
+
+async def logIn(conn, nonce):
+    query = urlencode({'auth': 'nonce', 'nonce': nonce})
+    status, headers, data = await conn.request('GET', f"/login/attempt?{query}")
+    if 'login' not in conn.cookies:
+        raise Exception(f"nonce login failed with status {status}")
+
+async def runConnection(conn, user, nonce, rng, warmupEnd, end, samples):
+    await logIn(conn, nonce)
+
+    names = [m[0] for m in MIX]
+    weights = [m[1] for m in MIX]
+    requests = {m[0]: m[2] for m in MIX}
+
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+
+        name, = rng.choices(names, weights)
+        start = time.perf_counter()
+        try:
+            status = await requests[name](conn, user)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await conn.close()
+            status = None
+
+        if start >= warmupEnd:
+            samples.setdefault(name, []).append((time.perf_counter() - start, status))
+
+    await conn.close()
+
+async def runLoad(uri, users, nonces, warmup, duration, seed):
+    host = urlparse(uri).hostname
+    port = urlparse(uri).port
+    samples = dict()
+
+    start = time.perf_counter()
+    warmupEnd = start + warmup
+    end = warmupEnd + duration
+
+    await asyncio.gather(*(
+        runConnection(Connection(host, port), user, nonce,
+                      random.Random(seed + i), warmupEnd, end, samples)
+        for i, (user, nonce) in enumerate(zip(users, nonces))
+        ))
+
+    return samples
+
+def percentile(sortedValues, p):
+    if not sortedValues:
+        return 0.0
+    i = max(0, min(len(sortedValues) - 1, round(p / 100 * len(sortedValues)) - 1))
+    return sortedValues[i]
+
+def summarize(samples, duration):
+    results = dict()
+    everything = []
+    for name, points in samples.items():
+        everything += points
+        results[name] = _stats(points, duration)
+    results['total'] = _stats(everything, duration)
+    return results
+
+def _stats(points, duration):
+    latencies = sorted(t * 1000 for t, _ in points)
+    errors = sum(1 for _, status in points if status is None or status >= 400)
+    return {
+        'requests': len(points),
+        'rps': len(points) / duration,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'errorRate': errors / len(points) if points else 0.0,
+    }
+
+def printResults(results, stream=sys.stdout):
+    print(f"{'endpoint':<22} {'reqs':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}", file=stream)
+    for name, r in results.items():
+        print(f"{name:<22} {r['requests']:7d} {r['rps']:9.1f} {r['p50']:8.2f} "
+              f"{r['p95']:8.2f} {r['p99']:8.2f} {r['errorRate']:7.1%}",
+              file=stream)
+
+# Flag endpoints whose throughput dropped or tail latency or error
+# rate grew by more than the tolerance
+def compare(baseline, results, tolerance):
+    regressions = []
+    for name, base in baseline.items():
+        cur = results.get(name)
+        if cur is None:
+            continue
+
+        if cur['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {base['rps']:.1f} -> {cur['rps']:.1f} rps")
+        if cur['p95'] > base['p95'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95']:.2f} -> {cur['p95']:.2f} ms")
+        if cur['errorRate'] > base['errorRate'] + 0.01:
+            regressions.append(f"{name}: errors {base['errorRate']:.1%} -> {cur['errorRate']:.1%}")
+    return regressions
+
+async def waitForServer(uri, timeout=10):
+    parsed = urlparse(uri)
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load benchmark for bin/serve.php')
+    parser.add_argument('--uri', default=os.environ.get('BENCH_BASE_URI', 'http://localhost:9990'))
+    parser.add_argument('-c', '--connections', type=int, default=8,
+                        help='concurrent connections, each its own user')
+    parser.add_argument('-d', '--duration', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='PHP_CLI_SERVER_WORKERS for php -S')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=str(dataDir / 'bench-baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--output', default=str(dataDir / 'bench-latest.json'))
+    args = parser.parse_args()
+
+    os.environ['PHP_CLI_SERVER_WORKERS'] = str(args.workers)
+
+    server = SiteServer(args.uri, dataDir / 'bench')
+    server.initialize()
+    users = seed(server, args.connections)
+
+    issuer = NonceIssuer(server)
+    server.start()
+    try:
+        nonces = issuer.issue(*(u.username for u in users))
+        issuer.close()
+        asyncio.run(waitForServer(args.uri))
+        samples = asyncio.run(runLoad(args.uri, users, nonces,
+                                      args.warmup, args.duration, args.seed))
+    finally:
+        issuer.close()
+        server.close()
+
+    results = summarize(samples, args.duration)
+    printResults(results)
+
+    report = {
+        'connections': args.connections,
+        'duration': args.duration,
+        'workers': args.workers,
+        'results': results,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baselinePath = Path(args.baseline)
+    if args.save_baseline:
+        with open(baselinePath, 'w') as f:
+            json.dump(report, f, indent=2)
+        return 0
+
+    if not baselinePath.exists():
+        return 0
+
+    with open(baselinePath) as f:
+        baseline = json.load(f)
+
+    regressions = compare(baseline['results'], results, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
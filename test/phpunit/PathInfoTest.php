@@ -0,0 +1,63 @@
+<?php
+
+use PHPUnit\Framework\TestCase;
+use Gulachek\Bassline\PathInfo;
+
+final class PathInfoTest extends TestCase
+{
+	public function testChildDropsFirstComponent(): void
+	{
+		$path = new PathInfo('/site/admin/users/');
+		$child = $path->child();
+
+		$this->assertEquals('/admin/users', $child->path());
+		$this->assertEquals(2, $child->count());
+		$this->assertEquals('admin', $child->at(0));
+		$this->assertEquals('users', $child->at(-1));
+		$this->assertFalse($child->isDir());
+	}
+
+	public function testDirDropsLastComponent(): void
+	{
+		$path = new PathInfo('/site/admin/users');
+		$this->assertEquals('/site/admin', $path->dir()->path());
+		$this->assertEquals('/admin', $path->child()->dir()->path());
+	}
+
+	public function testConcatResolvesParent(): void
+	{
+		$path = (new PathInfo('/app/path/x'))->child();
+		$this->assertEquals('/path/y/z', $path->concat('../y/z')->path());
+	}
+
+	public function testExtensionOfChild(): void
+	{
+		$path = new PathInfo('/hello/assets/main.js');
+		$this->assertEquals('js', $path->child()->child()->extension());
+		$this->assertEquals('main.js', $path->child()->basename());
+		$this->assertNull((new PathInfo('/hello/assets'))->extension());
+	}
+
+	public function testRootChildIsNull(): void
+	{
+		$this->assertNull((new PathInfo('/'))->child());
+	}
+
+	// Every level of a walk down the path is a view over the parsed
+	// components rather than a re-parsed copy.
+	public function testChildSharesComponents(): void
+	{
+		$path = new PathInfo('/site/admin/users/5');
+		$components = new \ReflectionProperty(PathInfo::class, 'components');
+		$offset = new \ReflectionProperty(PathInfo::class, 'offset');
+		$components->setAccessible(true);
+		$offset->setAccessible(true);
+
+		$depth = 0;
+		for ($p = $path; $p; $p = $p->child())
+		{
+			$this->assertEquals(['site', 'admin', 'users', '5'], $components->getValue($p));
+			$this->assertEquals($depth++, $offset->getValue($p));
+		}
+	}
+}
@@ -0,0 +1,81 @@
+<?php
+
+use PHPUnit\Framework\TestCase;
+use Gulachek\Bassline\PathInfo;
+use Gulachek\Bassline\RouteTable;
+use Gulachek\Bassline\Responder;
+use Gulachek\Bassline\RespondArg;
+use Gulachek\Bassline\NotFound;
+
+final class RouteTableTest extends TestCase
+{
+	private Responder $root;
+	private Responder $admin;
+	private Responder $users;
+
+	private function table(): array
+	{
+		$this->root = new RouteTableTestResponder();
+		$this->admin = new RouteTableTestResponder();
+		$this->users = new RouteTableTestResponder();
+
+		return [
+			'.' => $this->root,
+			'site' => [
+				'admin' => [
+					'.' => fn() => $this->admin,
+					'users' => fn() => $this->users
+				]
+			]
+		];
+	}
+
+	public function testDispatchMatchesDeepestRoute(): void
+	{
+		$routes = new RouteTable($this->table());
+		$del = $routes->dispatch(new PathInfo('/site/admin/users'));
+		$this->assertSame($this->users, $del->responder);
+		$this->assertTrue($del->path->isRoot());
+	}
+
+	public function testRootDispatchesToIndex(): void
+	{
+		$routes = new RouteTable($this->table());
+		$this->assertSame($this->root, $routes->dispatch(new PathInfo('/'))->responder);
+		$this->assertSame($this->admin, $routes->dispatch(new PathInfo('/site/admin/'))->responder);
+	}
+
+	public function testUnknownPrefixIsNotFound(): void
+	{
+		$routes = new RouteTable($this->table());
+		$this->assertInstanceOf(NotFound::class, $routes->dispatch(new PathInfo('/nope/admin'))->responder);
+		$this->assertInstanceOf(NotFound::class, $routes->dispatch(new PathInfo('/site/nope'))->responder);
+		$this->assertInstanceOf(NotFound::class, $routes->dispatch(new PathInfo('/site'))->responder);
+	}
+
+	public function testTrailingSegmentsGoToLeaf(): void
+	{
+		$routes = new RouteTable($this->table());
+		$del = $routes->dispatch(new PathInfo('/site/admin/users/5/edit'));
+		$this->assertSame($this->users, $del->responder);
+		$this->assertEquals('/5/edit', $del->path->path());
+	}
+
+	public function testOnlyMatchedClosuresRun(): void
+	{
+		$routes = new RouteTable([
+			'a' => fn() => new RouteTableTestResponder(),
+			'b' => fn() => $this->fail('unmatched route was constructed')
+		]);
+
+		$this->assertInstanceOf(RouteTableTestResponder::class, $routes->dispatch(new PathInfo('/a'))->responder);
+	}
+}
+
+class RouteTableTestResponder extends Responder
+{
+	public function respond(RespondArg $arg): mixed
+	{
+		return null;
+	}
+}
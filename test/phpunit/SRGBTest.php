@@ -0,0 +1,63 @@
+<?php
+
+use PHPUnit\Framework\TestCase;
+use Gulachek\Bassline\SRGB;
+
+final class SRGBTest extends TestCase
+{
+	const HEXES = ['#11c1e4', '#000000', '#ffffff', '#a568c9', '#ef6262', '#808080'];
+
+	public function testHexRoundTrips(): void
+	{
+		foreach (self::HEXES as $hex)
+			$this->assertEquals($hex, SRGB::fromHex(\strtoupper($hex))->toHex());
+	}
+
+	public function testShadeTableMatchesConversion(): void
+	{
+		foreach (SRGB::shadeTables(self::HEXES) as $i => $table)
+		{
+			for ($step = 0; $step <= SRGB::SHADE_STEPS; ++$step)
+			{
+				$lightness = $step / SRGB::SHADE_STEPS;
+				$this->assertEquals(
+					SRGB::shade(self::HEXES[$i], $lightness),
+					SRGB::lookupShade($table, $lightness)
+				);
+			}
+		}
+	}
+
+	public function testLookupOffStepIsNull(): void
+	{
+		$table = SRGB::shadeTable('#11c1e4');
+		$this->assertNull(SRGB::lookupShade($table, 0.123));
+		$this->assertNull(SRGB::lookupShade(null, 0.5));
+		$this->assertEquals(SRGB::shade('#11c1e4', 0.3), SRGB::lookupShade($table, 0.3));
+	}
+
+	// Rendering a theme used to convert every color on each request.
+	// Timings vary by machine, so this reports them instead of
+	// asserting on them. Run with --group benchmark.
+	/** @group benchmark */
+	public function testLookupVersusConversion(): void
+	{
+		$n = 2000;
+		$table = SRGB::shadeTable('#11c1e4');
+
+		$start = \hrtime(true);
+		for ($i = 0; $i < $n; ++$i)
+			SRGB::shade('#11c1e4', ($i % 101) / 100);
+		$converted = \hrtime(true) - $start;
+
+		$start = \hrtime(true);
+		for ($i = 0; $i < $n; ++$i)
+			SRGB::lookupShade($table, ($i % 101) / 100);
+		$looked_up = \hrtime(true) - $start;
+
+		\fprintf(STDERR, "\n%d shades: converted %.2fms, looked up %.2fms\n",
+			$n, $converted / 1e6, $looked_up / 1e6);
+
+		$this->assertEquals(SRGB::shade('#11c1e4', 0.42), SRGB::lookupShade($table, 0.42));
+	}
+}
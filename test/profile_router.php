@@ -0,0 +1,19 @@
+<?php
+
+// Router for `php -S` when uitest.py is profiling. Wraps
+// bin/serve.php and logs how long each request took. error_log goes
+// to the built-in server's stderr, which uilib reads back per test.
+
+$start = \hrtime(true);
+
+\register_shutdown_function(function () use ($start) {
+	$ms = (\hrtime(true) - $start) / 1e6;
+	\error_log(\sprintf('uitest-profile %s %s %d %.3f',
+		$_SERVER['REQUEST_METHOD'],
+		$_SERVER['REQUEST_URI'],
+		(int)\http_response_code(),
+		$ms
+	));
+});
+
+require __DIR__ . '/../bin/serve.php';
@@ -1,7 +1,9 @@
-from selenium.webdriver.support.wait import WebDriverWait
+from .wait import wait_until
 
 def wait_save(driver, timeout=10):
-    WebDriverWait(driver, timeout).until(edit_page_is_saved)
+    wait_until(driver, _SAVED, timeout=timeout, message='autosave still busy')
+
+_SAVED = 'return !("isBusy" in (document.querySelector(".autosave")?.dataset || {}));'
 
 def edit_page_is_saved(driver):
-    return driver.execute_script('return !("isBusy" in (document.querySelector(".autosave")?.dataset || {}))')
+    return driver.execute_script(_SAVED)
@@ -0,0 +1,123 @@
+import atexit
+import os
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+
+# Browsers are expensive to start, so they're pooled for the life of
+# the process and only reset between uses. If UITEST_WEBDRIVER_URL
+# names a running chromedriver (uitest.py -j starts one for all of its
+# workers), sessions are created there instead of starting a
+# chromedriver per process. Set UITEST_HEADFUL to watch the browser.
+
+WINDOW_SIZE = '1280,1024'
+
+def chromeOptions(profileDir):
+    options = webdriver.ChromeOptions()
+    if not os.environ.get('UITEST_HEADFUL'):
+        options.add_argument('--headless=new')
+
+    for arg in [
+            '--disable-extensions',
+            '--disable-gpu',
+            '--disable-dev-shm-usage',
+            '--no-first-run',
+            '--no-default-browser-check',
+            f"--window-size={WINDOW_SIZE}",
+            f"--user-data-dir={profileDir}",
+            ]:
+        options.add_argument(arg)
+
+    return options
+
+def startService():
+    service = Service()
+    service.start()
+    return service
+
+def _connect(url, options):
+    executor = ChromiumRemoteConnection(
+        remote_server_addr=url,
+        vendor_prefix='goog',
+        browser_name='chrome'
+        )
+    return webdriver.Remote(command_executor=executor, options=options)
+
+# Forget everything a test did without restarting the browser
+def reset(driver):
+    try:
+        driver.execute('executeCdpCommand', {
+            'cmd': 'Network.clearBrowserCookies',
+            'params': {}
+            })
+    except WebDriverException:
+        driver.delete_all_cookies()
+
+    # don't leave a page around that Site._navigate thinks is current
+    driver.get('about:blank')
+
+class BrowserPool:
+    def __init__(self, profileRoot):
+        self.profileRoot = Path(profileRoot)
+        self.idle = []
+        self.busy = []
+        self.profiles = dict()
+        self.service = None
+        atexit.register(self.close)
+
+    def _serviceUrl(self):
+        url = os.environ.get('UITEST_WEBDRIVER_URL')
+        if url:
+            return url
+
+        if self.service is None:
+            self.service = startService()
+        return self.service.service_url
+
+    # Chrome locks its profile, so each live browser gets its own
+    def _start(self):
+        used = set(self.profiles.values())
+        n = next(i for i in range(len(used) + 1) if i not in used)
+        profileDir = self.profileRoot / f"chrome-profile-{n}"
+        profileDir.mkdir(parents=True, exist_ok=True)
+
+        driver = _connect(self._serviceUrl(), chromeOptions(profileDir))
+        self.profiles[driver] = n
+        return driver
+
+    def _quit(self, driver):
+        self.profiles.pop(driver, None)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def acquire(self):
+        driver = self.idle.pop() if self.idle else self._start()
+        self.busy.append(driver)
+        return driver
+
+    def release(self, driver):
+        self.busy.remove(driver)
+        try:
+            reset(driver)
+        except WebDriverException:
+            # a browser that can't be reset can't be reused
+            self._quit(driver)
+            return
+
+        self.idle.append(driver)
+
+    def close(self):
+        for driver in self.idle + self.busy:
+            self._quit(driver)
+
+        self.idle = []
+        self.busy = []
+
+        if self.service is not None:
+            self.service.stop()
+            self.service = None
@@ -66,11 +66,12 @@ class ColorPaletteEditPage(Page):
         return self.driver.find_elements(By.CLASS_NAME, 'color-indicator')
 
     def colors(self):
-        elems = self._colorIndicators()
-        colors = dict()
-        for elem in elems:
-            colors[elem.get_attribute('data-name')] = elem.get_attribute('data-hex')
-        return colors
+        return self.driver.execute_script('''
+            const colors = {};
+            for (const elem of document.querySelectorAll(".color-indicator"))
+                colors[elem.dataset.name] = elem.dataset.hex;
+            return colors;
+        ''')
 
     def _colorElem(self, name):
         for elem in self._colorIndicators():
@@ -1,5 +1,27 @@
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
+from .wait import wait_until
+from . import profile
+
+_FIND = '''
+const [mode, selector] = arguments;
+switch (mode) {
+    case "class name": return document.querySelector("." + CSS.escape(selector));
+    case "id": return document.querySelector("#" + CSS.escape(selector));
+    case "name": return document.querySelector(`[name="${CSS.escape(selector)}"]`);
+    default: return document.querySelector(selector);
+}
+'''
+
+_CSS_MODES = [By.CSS_SELECTOR, By.CLASS_NAME, By.ID, By.NAME, By.TAG_NAME]
 
 def find_elem(driver, mode, selector, timeout=10):
-    WebDriverWait(driver, timeout).until(lambda d: d.find_element(mode, selector))
+    if mode in _CSS_MODES:
+        return wait_until(driver, _FIND, mode, selector,
+                          timeout=timeout,
+                          message=f"no element matching {mode} '{selector}'"
+                          )
+
+    with profile.timed('waits'):
+        WebDriverWait(driver, timeout).until(lambda d: d.find_element(mode, selector))
     return driver.find_element(mode, selector)
@@ -0,0 +1,260 @@
+import http.client
+from html.parser import HTMLParser
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, urljoin, urlencode
+
+# A browserless client for checks that only need the server rendered
+# HTML. Requests go over one reused connection (reopened whenever the
+# server closes it) with a cookie jar, and log in with the same nonces
+# as the browser.
+
+_VOID = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+         'link', 'meta', 'source', 'track', 'wbr'}
+
+class Element:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.parent = parent
+        self.children = []
+
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    def text(self):
+        parts = []
+        for child in self.children:
+            parts.append(child if isinstance(child, str) else child.text())
+        return ' '.join(''.join(parts).split())
+
+    def iter(self):
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child.iter()
+
+    def findAll(self, tag=None, className=None):
+        return [e for e in self.iter()
+                if (tag is None or e.tag == tag)
+                and (className is None or className in e.classes())]
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.root = Element('#document', {})
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        elem = Element(tag, attrs, self.current)
+        self.current.children.append(elem)
+        if tag not in _VOID:
+            self.current = elem
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Element(tag, attrs, self.current))
+
+    def handle_endtag(self, tag):
+        # tolerate unclosed elements by closing up to the match
+        elem = self.current
+        while elem is not self.root and elem.tag != tag:
+            elem = elem.parent
+        if elem is not self.root:
+            self.current = elem.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+def parseHtml(html):
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+class Response:
+    def __init__(self, status, headers, body, path):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.path = path
+        self._doc = None
+
+    def text(self):
+        return self.body.decode(errors='replace')
+
+    def doc(self):
+        if self._doc is None:
+            self._doc = parseHtml(self.text())
+        return self._doc
+
+class HttpClient:
+    def __init__(self, uri):
+        self.uri = urlparse(uri)
+        self.conn = None
+        self.cookies = dict()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def clearCookies(self):
+        self.cookies.clear()
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.uri.hostname, self.uri.port)
+        return self.conn
+
+    def _send(self, method, path, body, headers):
+        headers = dict(headers)
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+
+        # one retry in case the server dropped the idle connection
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self.close()
+                if attempt > 0:
+                    raise
+
+        for header in resp.headers.get_all('Set-Cookie') or []:
+            self._storeCookie(header)
+
+        return Response(resp.status, resp.headers, data, path)
+
+    def _storeCookie(self, header):
+        cookie = SimpleCookie()
+        cookie.load(header)
+        for name, morsel in cookie.items():
+            if morsel.value == '' or morsel['max-age'] == '0':
+                self.cookies.pop(name, None)
+            else:
+                self.cookies[name] = morsel.value
+
+    def request(self, method, path, body=None, headers={}, followRedirects=True):
+        resp = self._send(method, path, body, headers)
+        while followRedirects and resp.status in (301, 302, 303, 307, 308):
+            location = urlparse(urljoin(resp.path, resp.headers['Location']))
+            path = location.path + (f"?{location.query}" if location.query else '')
+            if resp.status in (301, 302, 303):
+                method, body = 'GET', None
+            resp = self._send(method, path, body, headers)
+        return resp
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+# Page objects over the server rendered HTML. Like the Selenium ones,
+# fromResponse returns None when the expected page didn't render,
+# e.g. the user isn't allowed to see it.
+
+class HtmlPage:
+    heading = None
+
+    def __init__(self, response):
+        self.response = response
+        self.doc = response.doc()
+
+    @classmethod
+    def fromResponse(cls, response):
+        page = cls(response)
+        if cls.heading is not None and not page.hasHeading(cls.heading):
+            return None
+        return page
+
+    def hasHeading(self, text):
+        return any(h.text() == text for h in self.doc.findAll('h1'))
+
+    def username(self):
+        elems = self.doc.findAll(className='username')
+        return elems[0].text() if elems else None
+
+class AdminHtmlPage(HtmlPage):
+    def _hasSection(self, title):
+        cards = self.doc.findAll(className='card')
+        return any(h.text() == title for c in cards for h in c.findAll('h2'))
+
+    def hasUsersSection(self):
+        return self._hasSection('Users')
+
+    def hasGroupsSection(self):
+        return self._hasSection('Groups')
+
+class UserSelectHtmlPage(HtmlPage):
+    heading = 'Select a user'
+
+    def hasUsername(self, username):
+        return any(a.text() == username for a in self.doc.findAll('a'))
+
+class GroupSelectHtmlPage(HtmlPage):
+    heading = 'Select a group'
+
+    def hasGroupname(self, groupname):
+        btns = [b for c in self.doc.findAll(className='group-container')
+                for b in c.findAll('button')]
+        return any(b.text() == groupname for b in btns)
+
+class _SelectOptionsPage(HtmlPage):
+    def _hasOption(self, text):
+        return any(o.text() == text for o in self.doc.findAll('option'))
+
+class ColorPaletteSelectHtmlPage(_SelectOptionsPage):
+    heading = 'Select color palette'
+
+    def hasPalette(self, name):
+        return self._hasOption(name)
+
+class ThemeSelectHtmlPage(_SelectOptionsPage):
+    heading = 'Select theme'
+
+    def hasTheme(self, name):
+        return self._hasOption(name)
+
+class HttpSite:
+    def __init__(self, uri, nonces):
+        self.client = HttpClient(uri)
+        self.nonces = nonces
+        self.response = None
+
+    def close(self):
+        self.client.close()
+
+    def _goto(self, path, pageClass=HtmlPage):
+        self.response = self.client.get(path)
+        return pageClass.fromResponse(self.response)
+
+    def logInAsUser(self, username):
+        nonce, = self.nonces.issue(username)
+        query = urlencode({ 'auth': 'nonce', 'nonce': nonce })
+        self._goto(f"/login/attempt?{query}")
+
+    def logOut(self):
+        self.client.clearCookies()
+
+    def currentUsername(self):
+        return HtmlPage(self.response).username()
+
+    def gotoLandingPage(self):
+        self._goto('/')
+        return 'find me selenium' in self.response.text()
+
+    def gotoAdminPage(self):
+        return self._goto('/site/admin/', AdminHtmlPage)
+
+    def gotoUserSelectPage(self):
+        return self._goto('/site/admin/users/', UserSelectHtmlPage)
+
+    def gotoGroupSelectPage(self):
+        return self._goto('/site/admin/groups/', GroupSelectHtmlPage)
+
+    def gotoColorPaletteSelectPage(self):
+        return self._goto('/site/admin/color_palette/', ColorPaletteSelectHtmlPage)
+
+    def gotoThemeSelectPage(self):
+        return self._goto('/site/admin/theme/', ThemeSelectHtmlPage)
@@ -0,0 +1,55 @@
+import subprocess
+from . import profile
+
+# Keeps one `issue_nonce.php --serve` process open so that logging in
+# doesn't pay for php startup and a new security.db connection every
+# time. Each request is a line of usernames and each response a line
+# of 'ok' and one nonce per username, or 'error <reason>'.
+class NonceIssuer:
+    def __init__(self, server):
+        self.server = server
+        self.process = None
+
+    def _start(self):
+        self.process = self.server.phpProcess(
+            'issue_nonce.php', '--serve',
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+            )
+
+    def issue(self, *usernames):
+        with profile.timed('subprocesses'):
+            return self._issue(usernames)
+
+    def _issue(self, usernames):
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+
+        self.process.stdin.write(' '.join(usernames) + '\n')
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            self.close()
+            raise Exception('nonce issuer exited unexpectedly')
+
+        status, *rest = line.split(' ', 1)
+        if status.strip() != 'ok':
+            raise Exception(f"failed to issue nonce: {line.strip()}")
+
+        return rest[0].split() if rest else []
+
+    def close(self):
+        if self.process is None:
+            return
+
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+        self.process.stdout.close()
+        self.process = None
@@ -0,0 +1,303 @@
+import argparse
+import heapq
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from urllib.parse import urlparse
+from . import profile
+from . import browser
+
+testDir = Path(__file__).parent.parent
+dataDir = testDir / 'data'
+durationsPath = dataDir / 'uitest-durations.json'
+
+# Usage: uitest.py [-j N] [--profile [PATH]] [--profile-top N] [unittest args...]
+#
+# With -j N (N > 1, or 0 for one worker per core) the test classes
+# are spread across N worker processes. Each worker is a separate
+# uitest.py with its own port, data dir and browser, so workers never
+# share a site. Class durations from previous runs are used to
+# balance the shards.
+#
+# --profile writes a per test JSON report (see uilib/profile.py) and
+# prints the --profile-top slowest tests.
+def main(module):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-j', '--jobs', type=int, default=1)
+    parser.add_argument('--worker')
+    parser.add_argument('--report')
+    parser.add_argument('--profile', nargs='?',
+                        const=str(dataDir / 'uitest-profile.json'))
+    parser.add_argument('--profile-top', type=int, default=10)
+    args, rest = parser.parse_known_args()
+
+    profilePath = args.profile or os.environ.get('UITEST_PROFILE')
+    if profilePath is not None:
+        os.environ['UITEST_PROFILE'] = profilePath
+
+    if args.worker is not None:
+        profile.fromEnv()
+        sys.exit(runWorker(module, args.worker.split(','), args.report))
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    if jobs == 1:
+        sys.exit(runSingle(module, rest, args.profile_top))
+    else:
+        sys.exit(runParallel(module, jobs, profilePath, args.profile_top))
+
+def runSingle(module, argv, top):
+    profiler = profile.fromEnv()
+    prog = unittest.main(module=module,
+                         argv=[sys.argv[0]] + argv,
+                         testRunner=RecordingRunner,
+                         exit=False
+                         )
+
+    if profiler is not None:
+        profiler.save()
+        profile.printSummary(profiler.report(), top)
+
+    return 0 if prog.result.wasSuccessful() else 1
+
+def _flatten(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _flatten(test)
+        else:
+            yield test
+
+def testClasses(module):
+    suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+    names = []
+    for test in _flatten(suite):
+        name = type(test).__name__
+        if name not in names:
+            names.append(name)
+    return names
+
+def loadDurations():
+    try:
+        with open(durationsPath) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def saveDurations(durations):
+    dataDir.mkdir(parents=True, exist_ok=True)
+    with open(durationsPath, 'w') as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+
+# Longest processing time first: hand the slowest remaining class to
+# the least loaded worker
+def shard(names, durations, jobs):
+    known = [durations[n] for n in names if n in durations]
+    default = sum(known) / len(known) if known else 1.0
+    costs = {n: durations.get(n, default) for n in names}
+
+    heap = [(0.0, i, []) for i in range(jobs)]
+    for name in sorted(names, key=lambda n: costs[n], reverse=True):
+        load, i, classes = heapq.heappop(heap)
+        classes.append(name)
+        heapq.heappush(heap, (load + costs[name], i, classes))
+
+    shards = sorted(heap, key=lambda h: h[1])
+    return [classes for _, _, classes in shards if classes]
+
+class RecordingResult(unittest.TextTestResult):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = dict()
+        self._start = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._start = time.perf_counter()
+
+        profiler = profile.active()
+        if profiler is not None:
+            profiler.startTest(test.id())
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        name = type(test).__name__
+        elapsed = time.perf_counter() - self._start
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+        profiler = profile.active()
+        if profiler is not None:
+            profiler.stopTest()
+
+    def report(self):
+        return {
+            'testsRun': self.testsRun,
+            'failures': [[t.id(), tb] for t, tb in self.failures],
+            'errors': [[t.id(), tb] for t, tb in self.errors],
+            'skipped': [[t.id(), reason] for t, reason in self.skipped],
+            'expectedFailures': len(self.expectedFailures),
+            'unexpectedSuccesses': [t.id() for t in self.unexpectedSuccesses],
+            'durations': self.durations,
+        }
+
+class RecordingRunner(unittest.TextTestRunner):
+    resultclass = RecordingResult
+
+def runWorker(module, classes, reportPath):
+    loader = unittest.defaultTestLoader
+    suite = unittest.TestSuite(
+        loader.loadTestsFromName(name, module) for name in classes
+        )
+
+    runner = RecordingRunner(verbosity=2)
+    result = runner.run(suite)
+
+    with open(reportPath, 'w') as f:
+        json.dump(result.report(), f)
+
+    profiler = profile.active()
+    if profiler is not None:
+        profiler.save()
+
+    return 0 if result.wasSuccessful() else 1
+
+def _workerUri(base, i):
+    uri = urlparse(base)
+    port = (uri.port or 9998) + i
+    return f"{uri.scheme}://{uri.hostname}:{port}"
+
+def runParallel(module, jobs, profilePath=None, profileTop=10):
+    names = testClasses(module)
+    durations = loadDurations()
+    shards = shard(names, durations, min(jobs, len(names)))
+
+    baseUri = os.environ.get('TEST_BASE_URI', 'http://localhost:9998')
+    dataDir.mkdir(parents=True, exist_ok=True)
+
+    # one chromedriver hosts every worker's browser session
+    service = None
+    webdriverUrl = os.environ.get('UITEST_WEBDRIVER_URL')
+    if not webdriverUrl:
+        service = browser.startService()
+        webdriverUrl = service.service_url
+
+    try:
+        return _runWorkers(shards, baseUri, webdriverUrl, durations,
+                           profilePath, profileTop)
+    finally:
+        if service is not None:
+            service.stop()
+
+def _runWorkers(shards, baseUri, webdriverUrl, durations, profilePath, profileTop):
+    start = time.perf_counter()
+    workers = []
+    for i, classes in enumerate(shards):
+        env = dict(os.environ)
+        env['TEST_BASE_URI'] = _workerUri(baseUri, i)
+        env['UITEST_DATA_DIR'] = str(dataDir / f"uitest-{i}")
+        env['UITEST_WEBDRIVER_URL'] = webdriverUrl
+        if profilePath is not None:
+            workerProfile = dataDir / f"uitest-{i}.profile.json"
+            workerProfile.unlink(missing_ok=True)
+            env['UITEST_PROFILE'] = str(workerProfile)
+
+        reportPath = dataDir / f"uitest-{i}.json"
+        logPath = dataDir / f"uitest-{i}.log"
+        reportPath.unlink(missing_ok=True)
+
+        with open(logPath, 'w') as log:
+            proc = subprocess.Popen(
+                args=[sys.executable, sys.argv[0],
+                      '--worker', ','.join(classes),
+                      '--report', str(reportPath)
+                      ],
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=env
+                )
+
+        workers.append((proc, classes, reportPath, logPath))
+
+    merged = {
+        'testsRun': 0,
+        'failures': [],
+        'errors': [],
+        'skipped': [],
+        'expectedFailures': 0,
+        'unexpectedSuccesses': [],
+        'durations': {},
+    }
+
+    for proc, classes, reportPath, logPath in workers:
+        proc.wait()
+        try:
+            with open(reportPath) as f:
+                report = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            msg = f"worker exited with status {proc.returncode} without a report. See {logPath}"
+            merged['errors'].append([','.join(classes), msg])
+            continue
+
+        for key in ['testsRun', 'expectedFailures']:
+            merged[key] += report[key]
+        for key in ['failures', 'errors', 'skipped', 'unexpectedSuccesses']:
+            merged[key] += report[key]
+        merged['durations'].update(report['durations'])
+
+    elapsed = time.perf_counter() - start
+
+    durations.update(merged['durations'])
+    saveDurations(durations)
+
+    printReport(merged, elapsed, len(workers))
+
+    if profilePath is not None:
+        mergeProfiles(len(workers), profilePath, profileTop)
+
+    ok = not (merged['failures'] or merged['errors'] or merged['unexpectedSuccesses'])
+    return 0 if ok else 1
+
+def mergeProfiles(nworkers, profilePath, top):
+    reports = []
+    for i in range(nworkers):
+        try:
+            with open(dataDir / f"uitest-{i}.profile.json") as f:
+                reports.append(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+
+    report = profile.mergeReports(reports)
+    with open(profilePath, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    profile.printSummary(report, top)
+
+def printReport(report, elapsed, nworkers, stream=sys.stderr):
+    sep1 = '=' * 70
+    sep2 = '-' * 70
+
+    for kind, key in [('ERROR', 'errors'), ('FAIL', 'failures')]:
+        for testId, tb in report[key]:
+            print(sep1, file=stream)
+            print(f"{kind}: {testId}", file=stream)
+            print(sep2, file=stream)
+            print(tb, file=stream)
+
+    print(sep2, file=stream)
+    print(f"Ran {report['testsRun']} tests in {elapsed:.3f}s on {nworkers} workers", file=stream)
+    print(file=stream)
+
+    counts = [
+        ('failures', len(report['failures'])),
+        ('errors', len(report['errors'])),
+        ('skipped', len(report['skipped'])),
+        ('expected failures', report['expectedFailures']),
+        ('unexpected successes', len(report['unexpectedSuccesses'])),
+    ]
+    detail = ', '.join(f"{name}={n}" for name, n in counts if n)
+
+    failed = report['failures'] or report['errors'] or report['unexpectedSuccesses']
+    status = 'FAILED' if failed else 'OK'
+    print(f"{status} ({detail})" if detail else status, file=stream)
@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# Opt-in profiling for uitest.py. Set UITEST_PROFILE to the path of
+# the JSON report (uitest.py --profile does this) and every test
+# records its wall time, WebDriver commands, time spent waiting on
+# the page, php subprocesses and the server's own response times.
+
+OUTSIDE = '(outside tests)'
+
+_LOG_LINE = re.compile(r'uitest-profile (\S+) (\S+) (\d+) ([\d.]+)')
+
+_KINDS = ['commands', 'waits', 'subprocesses', 'requests']
+
+def _newStats():
+    stats = {'wall': 0.0}
+    for kind in _KINDS:
+        stats[kind] = 0
+        stats[f"{kind}Time"] = 0.0
+    stats['slowestRequests'] = []
+    return stats
+
+class Profiler:
+    def __init__(self, reportPath):
+        self.reportPath = Path(reportPath)
+        self.tests = {OUTSIDE: _newStats()}
+        self.current = OUTSIDE
+        self.logPath = None
+        self.logOffset = 0
+        self._start = None
+
+    def _stats(self):
+        return self.tests.setdefault(self.current, _newStats())
+
+    def record(self, kind, seconds):
+        stats = self._stats()
+        stats[kind] += 1
+        stats[f"{kind}Time"] += seconds
+
+    @contextmanager
+    def timed(self, kind):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, time.perf_counter() - start)
+
+    def wrapDriver(self, driver):
+        executor = driver.command_executor
+        execute = executor.execute
+
+        def profiledExecute(command, params):
+            with self.timed('commands'):
+                return execute(command, params)
+
+        executor.execute = profiledExecute
+
+    # php -S appends to this log for the life of the server
+    def watchServerLog(self, logPath):
+        self.logPath = Path(logPath)
+        self.logOffset = self.logPath.stat().st_size if self.logPath.exists() else 0
+
+    def _readServerLog(self):
+        if self.logPath is None or not self.logPath.exists():
+            return
+
+        with open(self.logPath, 'rb') as f:
+            f.seek(self.logOffset)
+            data = f.read()
+
+        # leave a partially written line for next time
+        end = data.rfind(b'\n') + 1
+        self.logOffset += end
+
+        stats = self._stats()
+        for line in data[:end].decode(errors='replace').splitlines():
+            m = _LOG_LINE.search(line)
+            if m is None:
+                continue
+
+            method, uri, status, ms = m.groups()
+            self.record('requests', float(ms) / 1000)
+            stats['slowestRequests'].append([method, uri, int(status), float(ms)])
+
+        stats['slowestRequests'].sort(key=lambda r: r[3], reverse=True)
+        del stats['slowestRequests'][5:]
+
+    def startTest(self, testId):
+        self._readServerLog()
+        self.current = testId
+        self._start = time.perf_counter()
+
+    def stopTest(self):
+        self._readServerLog()
+        self._stats()['wall'] += time.perf_counter() - self._start
+        self.current = OUTSIDE
+
+    def report(self):
+        self._readServerLog()
+        return {'tests': self.tests}
+
+    def save(self):
+        self.reportPath.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.reportPath, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+_active = None
+
+def fromEnv():
+    global _active
+    path = os.environ.get('UITEST_PROFILE')
+    if _active is None and path:
+        _active = Profiler(path)
+    return _active
+
+def active():
+    return _active
+
+def timed(kind):
+    return nullcontext() if _active is None else _active.timed(kind)
+
+def mergeReports(reports):
+    merged = {'tests': {OUTSIDE: _newStats()}}
+    for report in reports:
+        for testId, stats in report['tests'].items():
+            if testId != OUTSIDE:
+                merged['tests'][testId] = stats
+                continue
+
+            outside = merged['tests'][OUTSIDE]
+            for key, value in stats.items():
+                if key == 'slowestRequests':
+                    outside[key] = sorted(outside[key] + value,
+                                          key=lambda r: r[3], reverse=True)[:5]
+                else:
+                    outside[key] += value
+    return merged
+
+def printSummary(report, top=10, stream=sys.stderr):
+    tests = sorted(report['tests'].items(),
+                   key=lambda t: t[1]['wall'], reverse=True)
+
+    print(f"Slowest {top} tests:", file=stream)
+    print(f"{'wall':>8} {'cmds':>5} {'cmd s':>7} {'wait s':>7} {'php s':>7} {'reqs':>5} {'req s':>7}  test", file=stream)
+    for testId, s in tests[:top]:
+        print(f"{s['wall']:8.3f} {s['commands']:5d} {s['commandsTime']:7.3f} "
+              f"{s['waitsTime']:7.3f} {s['subprocessesTime']:7.3f} "
+              f"{s['requests']:5d} {s['requestsTime']:7.3f}  {testId}",
+              file=stream)
+        for method, uri, status, ms in s['slowestRequests'][:1]:
+            print(f"{'':>8} slowest request: {method} {uri} [{status}] {ms:.1f}ms", file=stream)
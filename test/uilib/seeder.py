@@ -0,0 +1,229 @@
+from pathlib import Path
+import os
+import sqlite3
+
+# Write fixture data straight into the site databases instead of
+# driving the admin pages. Statements come from the same sql/ files
+# the PHP side uses where the schema needs more than a plain insert.
+class Seeder:
+    def __init__(self, dataDir):
+        self.dataDir = Path(dataDir)
+        self.sqlDir = Path(__file__).parent.parent.parent / 'sql'
+        self._security = None
+        self._color = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        self.close(commit=excType is None)
+
+    def close(self, commit=True):
+        if commit and self._color is not None:
+            self._invalidateThemeCss()
+
+        for db in [self._security, self._color]:
+            if db is None:
+                continue
+            if commit:
+                db.commit()
+            else:
+                db.rollback()
+            db.close()
+
+        self._security = None
+        self._color = None
+
+    def _sql(self, name):
+        return (self.sqlDir / f"{name}.sql").read_text()
+
+    def _connect(self, name):
+        db = sqlite3.connect(self.dataDir / name)
+        db.execute('PRAGMA busy_timeout=5000')
+        return db
+
+    @property
+    def security(self):
+        if self._security is None:
+            self._security = self._connect('security.db')
+        return self._security
+
+    @property
+    def color(self):
+        if self._color is None:
+            self._color = self._connect('color.db')
+        return self._color
+
+    def _value(self, db, sql, params=()):
+        row = db.execute(sql, params).fetchone()
+        return None if row is None else row[0]
+
+    # Security
+
+    def setProp(self, name, value):
+        self.security.execute(self._sql('set-prop'), {
+            'name': name,
+            'value': value
+            })
+
+    def deleteProp(self, name):
+        self.security.execute(self._sql('delete-prop'), (name,))
+
+    def enableAuth(self, noauth=True, googleClientId=None, signInWithGoogle=False):
+        if noauth:
+            self.setProp('auth-plugin-noauth-enabled', '1')
+        else:
+            self.deleteProp('auth-plugin-noauth-enabled')
+
+        if googleClientId is not None:
+            self.setProp('google-client-id', googleClientId)
+
+        if signInWithGoogle:
+            self.setProp('auth-plugin-siwg-enabled', '1')
+        else:
+            self.deleteProp('auth-plugin-siwg-enabled')
+
+    def groupId(self, groupname):
+        gid = self._value(self.security,
+                          'SELECT id FROM groups WHERE groupname=?',
+                          (groupname,))
+        if gid is None:
+            raise Exception(f"no group with name {groupname}")
+        return gid
+
+    def userId(self, username):
+        uid = self._value(self.security,
+                          'SELECT id FROM users WHERE username=?',
+                          (username,))
+        if uid is None:
+            raise Exception(f"no user with name {username}")
+        return uid
+
+    def capabilityId(self, app, capName):
+        cid = self._value(self.security,
+                          'SELECT id FROM capabilities WHERE app=? AND name=?',
+                          (app, capName))
+        if cid is None:
+            raise Exception(f"no capability {app}.{capName}")
+        return cid
+
+    # capabilities is a list of (app, capability name) pairs
+    def createGroup(self, groupname, capabilities=()):
+        cur = self.security.execute(
+            'INSERT INTO groups (groupname) VALUES (?)',
+            (groupname,))
+        gid = cur.lastrowid
+        for app, capName in capabilities:
+            self.grantCapability(groupname, app, capName)
+        return gid
+
+    def grantCapability(self, groupname, app, capName):
+        self.security.execute(self._sql('add-group-capability'), {
+            'group': self.groupId(groupname),
+            'cap': self.capabilityId(app, capName)
+            })
+
+    # groupname is the primary group. groups are any others.
+    def createUser(self, username, groupname, groups=(), gmails=()):
+        cur = self.security.execute(
+            'INSERT INTO users (username, primary_group) VALUES (?, ?)',
+            (username, self.groupId(groupname)))
+        uid = cur.lastrowid
+
+        joinGroup = self._sql('join-group')
+        self.security.execute(joinGroup, {'user': uid, 'group': None})
+        for group in groups:
+            self.security.execute(joinGroup, {
+                'user': uid,
+                'group': self.groupId(group)
+                })
+
+        addGmail = self._sql('add-gmail')
+        for email in gmails:
+            self.security.execute(addGmail, {'email': email, 'id': uid})
+
+        return uid
+
+    # Colors
+
+    # colors maps color names to '#rrggbb'
+    def createPalette(self, name, colors=None):
+        colors = colors or {'New Color': '#000000'}
+        cur = self.color.execute(self._sql('create-palette'), (name,))
+        pid = cur.lastrowid
+        for colorName, hexval in colors.items():
+            self.color.execute(
+                'INSERT INTO palette_color (palette, name, hex) VALUES (?, ?, ?)',
+                (pid, colorName, hexval))
+        return pid
+
+    def paletteColorId(self, paletteId, colorName):
+        cid = self._value(self.color,
+                          'SELECT id FROM palette_color WHERE palette=? AND name=?',
+                          (paletteId, colorName))
+        if cid is None:
+            raise Exception(f"no palette color with name {colorName}")
+        return cid
+
+    # Same shape as ColorDatabase::createTheme: system colors, one
+    # 'New Color' theme color and every app color mapped to it
+    def createTheme(self, name, paletteId, isDark=False):
+        cur = self.color.execute(
+            'INSERT INTO theme (name, palette) VALUES (?, ?)',
+            (name, paletteId))
+        tid = cur.lastrowid
+
+        self.color.execute(self._sql('init-theme-system-colors'), {
+            'theme': tid,
+            'is_dark': isDark
+            })
+        cur = self.color.execute(self._sql('create-theme-color'), (tid,))
+        self.color.execute(self._sql('init-theme-color-map'), {
+            'theme': tid,
+            'theme_color': cur.lastrowid
+            })
+        return tid
+
+    def addThemeColor(self, themeId, name, paletteColorName, lightness):
+        paletteId = self._value(self.color,
+                                'SELECT palette FROM theme WHERE id=?',
+                                (themeId,))
+        cur = self.color.execute(
+            'INSERT INTO theme_color (theme, name, palette_color, lightness) VALUES (?, ?, ?, ?)',
+            (themeId, name, self.paletteColorId(paletteId, paletteColorName), lightness))
+        return cur.lastrowid
+
+    def mapColor(self, themeId, app, colorName, themeColorName):
+        themeColor = self._value(self.color,
+                                 'SELECT id FROM theme_color WHERE theme=? AND name=?',
+                                 (themeId, themeColorName))
+        if themeColor is None:
+            raise Exception(f"no theme color with name {themeColorName}")
+
+        self.color.execute('''
+            UPDATE theme_color_map SET theme_color=:theme_color
+            WHERE theme=:theme AND app_color=(
+                SELECT id FROM app_color WHERE app=:app AND name=:name
+            )''', {
+            'theme_color': themeColor,
+            'theme': themeId,
+            'app': app,
+            'name': colorName
+            })
+
+    # Same as ColorDatabase::invalidateThemeCss: cached theme.css is
+    # keyed by the revision and the combined stylesheet by its hash
+    def _invalidateThemeCss(self):
+        self.color.execute(self._sql('set-prop'), {
+            'name': 'theme-css-revision',
+            'value': os.urandom(8).hex()
+            })
+        self.color.execute(self._sql('delete-prop'), ('site-theme-css-hash',))
+
+    # status is 'light' or 'dark'
+    def activateTheme(self, status, themeId):
+        self.color.execute(self._sql('deactivate-theme'), (themeId,))
+        self.color.execute(self._sql('set-prop'), {
+            'name': f"active-{status}-theme",
+            'value': themeId
+            })
@@ -0,0 +1,83 @@
+from pathlib import Path
+import subprocess
+import os
+from urllib.parse import urlparse
+from . import profile
+
+class SiteServer:
+    def __init__(self, uri, dataDir):
+        self.uri = uri
+        self.dataDir = Path(dataDir)
+        self.testDir = Path(__file__).parent.parent
+        self.rootDir = self.testDir.parent
+        self.configPath = self.testDir / 'config.php'
+        self.logPath = self.dataDir / 'server.log'
+        self.process = None
+
+    @classmethod
+    def fromEnv(cls):
+        testDir = Path(__file__).parent.parent
+        uri = os.environ.get('TEST_BASE_URI', 'http://localhost:9998')
+        dataDir = os.environ.get('UITEST_DATA_DIR', testDir / 'data' / 'uitest')
+        return cls(uri, dataDir)
+
+    def env(self):
+        env = dict(os.environ)
+        env['DATA_DIR'] = str(self.dataDir.absolute())
+        env['SITE_CONFIG_PATH'] = str(self.configPath)
+        return env
+
+    def _phpArgs(self, script, args):
+        return ['php',
+                f"{self.rootDir}/bin/{script}",
+                str(self.configPath),
+                *args
+                ]
+
+    def php(self, script, *args, **kwargs):
+        with profile.timed('subprocesses'):
+            return subprocess.run(
+                args=self._phpArgs(script, args),
+                env=self.env(),
+                **kwargs
+                )
+
+    def phpProcess(self, script, *args, **kwargs):
+        return subprocess.Popen(
+            args=self._phpArgs(script, args),
+            env=self.env(),
+            **kwargs
+            )
+
+    def clear(self):
+        self.dataDir.mkdir(parents=True, exist_ok=True)
+        [os.remove(p) for p in self.dataDir.iterdir() if p.is_file()]
+
+    def initialize(self):
+        self.clear()
+        self.php('init.php', '--skip-client-build', check=True)
+
+    def start(self):
+        netloc = urlparse(self.uri).netloc
+        router = self.rootDir / 'bin' / 'serve.php'
+
+        profiler = profile.active()
+        if profiler is not None:
+            router = self.testDir / 'profile_router.php'
+            profiler.watchServerLog(self.logPath)
+
+        # log to a file so a long run can't fill up an unread pipe
+        with open(self.logPath, 'ab') as log:
+            self.process = subprocess.Popen(
+                args=['php', '-S', netloc, str(router)],
+                stderr=log,
+                env=self.env()
+                )
+
+    def close(self):
+        if self.process is None:
+            return
+
+        self.process.kill()
+        self.process.wait()
+        self.process = None
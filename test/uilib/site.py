@@ -1,4 +1,3 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 
@@ -9,78 +8,107 @@ from .admin import AdminPage
 from .auth import AuthConfigEditPage
 from .color_palette import ColorPaletteSelectPage
 from .theme import ThemeSelectPage
+from .server import SiteServer
+from .snapshot import Snapshot
+from .seeder import Seeder
+from .nonce import NonceIssuer
+from .browser import BrowserPool, reset
+from .http_site import HttpSite
+from . import profile
 
-from pathlib import Path
-import subprocess
-import os
-import sys
 from urllib.parse import urlparse, urlencode
 
 class Site:
     _instance = None
+    _browsers = None
 
-    def __init__(self, uri, driver, webServer, rootDir):
+    def __init__(self, uri, driver, server, snapshot):
         self.uri = uri
         self.driver = driver
-        self.webServer = webServer
-        self.rootDir = rootDir
+        self.server = server
+        self.rootDir = server.rootDir
+        self.snapshot = snapshot
+        self.nonces = NonceIssuer(server)
+        # for checks that don't need a browser
+        self.http = HttpSite(uri, self.nonces)
 
     def setup(self):
-        self.logInAsUser('admin')
-        self.enableAuth()
-        # Designers
-        groupPage = self.createGroup('designers')
-        groupPage.toggleSecurity('shell', 'edit_themes')
-        groupPage.waitSave()
-        self.createUser('designer', 'designers')
-        # Plebs
-        self.createGroup('plebs')
-        self.createUser('pleb', 'plebs')
-        self.logOut()
-
-    def close():
-        self.driver.close()
-        self.webServer.kill()
+        with self.seeder() as seed:
+            seed.enableAuth(noauth=True,
+                            googleClientId='dummy',
+                            signInWithGoogle=True
+                            )
+            # Designers
+            seed.createGroup('designers', [('shell', 'edit_themes')])
+            seed.createUser('designer', 'designers')
+            # Plebs
+            seed.createGroup('plebs')
+            seed.createUser('pleb', 'plebs')
+
+    def seeder(self):
+        return Seeder(self.server.dataDir)
+
+    def close(self):
+        self.http.close()
+        self.nonces.close()
+        Site._browsers.release(self.driver)
+        self.server.close()
 
     # Unit test framework doesn't make test fixture initialization
     # Seem obvious, so 😭 go with singleton
+    # TEST_BASE_URI and UITEST_DATA_DIR select the port and data
+    # directory so that parallel workers each get their own site
     @classmethod
     def instance(cls):
         if cls._instance is not None:
-            return csl._instance
-
-        uri = os.environ.get('TEST_BASE_URI', 'http://localhost:9998' )
-        testDir = Path(__file__).parent.parent
-        testData = testDir / 'data' / 'uitest'
-
-        [os.remove(p) for p in testData.iterdir()]
-        testEnv = dict(os.environ)
-        testEnv['DATA_DIR'] = str(testData.absolute())
-        testEnv['SITE_CONFIG_PATH'] = str(testDir / 'config.php')
-
-        rootDir = testDir.parent
-
-        # Init database
-        subprocess.run([
-            'php', 
-            f"{rootDir}/bin/init.php",
-            f"{rootDir}/test/config.php",
-            "--skip-client-build"
-            ], env=testEnv) 
-
-        # Spawn web server
-        netloc = urlparse(uri).netloc
-        webServer = subprocess.Popen(
-            args=['php', '-S', netloc, f"{rootDir}/bin/serve.php"],
-            stderr=subprocess.PIPE,
-            env=testEnv
-            )
-        
-        driver = webdriver.Chrome()
-
-        cls._instance = Site(uri, driver, webServer, rootDir)
-        cls._instance.setup()
-        return cls._instance
+            return cls._instance
+
+        server = SiteServer.fromEnv()
+        snapshot = Snapshot.forFixture(server.rootDir)
+
+        restored = snapshot.exists()
+        if restored:
+            server.clear()
+            snapshot.restore(server.dataDir)
+        else:
+            server.initialize()
+
+        server.start()
+
+        if cls._browsers is None:
+            cls._browsers = BrowserPool(server.dataDir)
+        driver = cls._browsers.acquire()
+
+        profiler = profile.active()
+        if profiler is not None:
+            profiler.wrapDriver(driver)
+
+        site = Site(server.uri, driver, server, snapshot)
+        if not restored:
+            site.setup()
+            snapshot.capture(server.dataDir)
+
+        cls._instance = site
+        return site
+
+    @classmethod
+    def closeInstance(cls):
+        if cls._instance is None:
+            return
+
+        cls._instance.close()
+        cls._instance = None
+
+    # Put the databases back to how they were right after setup()
+    def restoreSnapshot(self):
+        # the issuer's connection would still see the replaced file
+        self.nonces.close()
+        self.http.logOut()
+        self.snapshot.restore(self.server.dataDir)
+
+    # Log out by forgetting cookies instead of a round trip to /logout/
+    def resetSession(self):
+        reset(self.driver)
 
     def currentUri(self):
         return self.driver.current_url
@@ -143,33 +171,15 @@ class Site:
     def logOut(self):
         self._navigate('/logout/')
 
+    # One nonce per username, issued in a single request
+    def issueNonces(self, *usernames):
+        return self.nonces.issue(*usernames)
+
     def logInAsUser(self, username):
-        testEnv = dict(os.environ)
-        testDir = Path(__file__).parent.parent
-        testData = testDir / 'data' / 'uitest'
-        testEnv['DATA_DIR'] = str(testData.absolute())
-        testEnv['SITE_CONFIG_PATH'] = str(testDir / 'config.php')
-        proc = subprocess.run(
-            args=['php',
-                  f"{self.rootDir}/bin/issue_nonce.php",
-                  f"{self.rootDir}/test/config.php",
-                  username
-                  ],
-            capture_output=True,
-            text=True,
-            env=testEnv
-            )
-        nonce = proc.stdout.strip()
+        nonce, = self.issueNonces(username)
         query = urlencode({ 'auth': 'nonce', 'nonce': nonce })
         self._navigate(f"/login/attempt?{query}")
 
-    def enableAuth(self):
-        page = self.gotoAuthConfigEditPage()
-        page.enableNoauth(True)
-        page.setGoogleClientId('dummy')
-        page.enableSignInWithGoogle(True)
-        page.waitSave()
-
     def createUser(self, username, groupname):
         select = self.gotoUserSelectPage()
         edit = select.createUser()
@@ -0,0 +1,83 @@
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+
+DATABASES = ['install.db', 'color.db', 'security.db']
+
+# Everything that can change what init.php and Site.setup() write to
+# the data dir. sql/ and src/ define the schemas and installation,
+# config.php and the apps define the app versions, colors and
+# capabilities, and Site.setup() defines the seeded users and groups.
+def _fixtureSources(rootDir):
+    testDir = rootDir / 'test'
+    yield from sorted((rootDir / 'sql').rglob('*.sql'))
+    yield from sorted((rootDir / 'src').rglob('*.php'))
+    yield testDir / 'config.php'
+    yield from sorted((testDir / 'hello').rglob('*.php'))
+    yield testDir / 'uilib' / 'site.py'
+    yield testDir / 'uilib' / 'seeder.py'
+
+def fixtureKey(rootDir):
+    rootDir = Path(rootDir)
+    h = hashlib.sha256()
+    for path in _fixtureSources(rootDir):
+        h.update(str(path.relative_to(rootDir)).encode())
+        h.update(b'\0')
+        h.update(path.read_bytes())
+        h.update(b'\0')
+    return h.hexdigest()[:16]
+
+def _removeSidecars(db):
+    for suffix in ['-wal', '-shm', '-journal']:
+        Path(f"{db}{suffix}").unlink(missing_ok=True)
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @classmethod
+    def forFixture(cls, rootDir):
+        snapshots = Path(rootDir) / 'test' / 'data' / 'snapshots'
+        return cls(snapshots / fixtureKey(rootDir))
+
+    def exists(self):
+        return all((self.path / db).is_file() for db in DATABASES)
+
+    def capture(self, dataDir):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.path.parent, prefix='.capture-'))
+
+        try:
+            # backup API gives a consistent copy even if a server
+            # process still has the database open
+            for db in DATABASES:
+                src = sqlite3.connect(Path(dataDir) / db)
+                dst = sqlite3.connect(tmp / db)
+                try:
+                    src.backup(dst)
+                finally:
+                    dst.close()
+                    src.close()
+
+            # parallel workers may race to capture the same fixture
+            os.rename(tmp, self.path)
+        except OSError:
+            if not self.exists():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def restore(self, dataDir):
+        dataDir = Path(dataDir)
+        dataDir.mkdir(parents=True, exist_ok=True)
+
+        for db in DATABASES:
+            target = dataDir / db
+            tmp = dataDir / f".{db}.restore"
+            shutil.copyfile(self.path / db, tmp)
+            # stale journals would be replayed into the restored file
+            _removeSidecars(target)
+            os.replace(tmp, target)
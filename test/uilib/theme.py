@@ -4,6 +4,46 @@ from selenium.webdriver.support.wait import WebDriverWait
 from .autosave import wait_save
 from .page import Page
 
+_THEME_COLORS = '''
+const colors = {};
+for (const elem of document.querySelectorAll(".theme-color-edit")) {
+    colors[elem.innerText.trim()] = {
+        color: elem.dataset.color,
+        lightness: parseFloat(elem.dataset.lightness)
+    };
+}
+return colors;
+'''
+
+# Only the selected app's mappings are rendered, so switch the app
+# select through each option in page and read them all in one call
+_MAPPINGS = '''
+const done = arguments[arguments.length - 1];
+const apps = document.querySelector(".app-select");
+const setValue = Object.getOwnPropertyDescriptor(HTMLSelectElement.prototype, "value").set;
+const rendered = () => new Promise(resolve => setTimeout(resolve));
+
+const selectApp = async (value) => {
+    setValue.call(apps, value);
+    apps.dispatchEvent(new Event("change", { bubbles: true }));
+    await rendered();
+};
+
+(async () => {
+    const original = apps.value;
+    const mappings = {};
+    for (const opt of Array.from(apps.options)) {
+        await selectApp(opt.value);
+        const appMappings = mappings[opt.text.trim()] = {};
+        for (const sel of document.querySelectorAll(".mapping-select")) {
+            appMappings[sel.dataset.mappingName] = sel.selectedOptions[0].text.trim();
+        }
+    }
+    await selectApp(original);
+    done(mappings);
+})();
+'''
+
 class ThemeSelectPage(Page):
     @classmethod
     def fromDriver(cls, driver):
@@ -71,14 +111,7 @@ class ThemeEditPage(Page):
         return self.elems(By.CLASS_NAME, 'theme-color-edit')
 
     def themeColors(self):
-        elems = self._themeColorBtns()
-        colors = dict()
-        for elem in elems:
-            colors[elem.text] = {
-                'color': elem.get_attribute('data-color'),
-                'lightness': float(elem.get_attribute('data-lightness')),
-            }
-        return colors
+        return self.driver.execute_script(_THEME_COLORS)
 
     def _themeColorElem(self, name):
         for elem in self._themeColorBtns():
@@ -133,17 +166,7 @@ class ThemeEditPage(Page):
         return Select(self.elem(By.CLASS_NAME, 'app-select'))
 
     def mappings(self):
-        apps = self._appSelectElem()
-        mappings = dict()
-        for opt in apps.options:
-            appName = opt.text
-            apps.select_by_visible_text(appName)
-            mappings[appName] = dict()
-            for e in self.elems(By.CLASS_NAME, 'mapping-select'):
-                mappingName = e.get_attribute('data-mapping-name')
-                value = Select(e).all_selected_options[0].text
-                mappings[appName][mappingName] = value
-        return mappings
+        return self.driver.execute_async_script(_MAPPINGS)
 
     def _selectApp(self, name):
         sel = self._appSelectElem()
@@ -74,9 +74,6 @@ class UserEditPage(Page):
     def isGroupMember(self, groupname):
         return self._groupCboxIsChecked(groupname)
 
-    def _emailButtons(self):
-        return self.elems(By.CSS_SELECTOR, '.siwg .array button')
-
     def _siwgBtn(self, text):
         btns = self.elems(By.CSS_SELECTOR, '.siwg button')
         return next((b for b in btns if b.text == text), None)
@@ -87,7 +84,9 @@ class UserEditPage(Page):
         elem.send_keys(email)
 
     def emails(self):
-        return {b.text for b in self._emailButtons()}
+        return set(self.driver.execute_script(
+            'return Array.from(document.querySelectorAll(".siwg .array button"), b => b.innerText.trim());'
+            ))
 
     def addEmail(self, email):
         self._siwgBtn('+').click()
@@ -0,0 +1,66 @@
+from selenium.common.exceptions import TimeoutException
+from . import profile
+
+# Installs a single MutationObserver per page that re-checks pending
+# waits whenever the DOM changes, so a wait is one execute_async_script
+# round trip instead of a WebDriverWait polling loop. The predicate is
+# a function body that returns a truthy value once the wait is over.
+_WAIT_SCRIPT = '''
+const [body, args, timeoutMs, done] = arguments;
+
+if (!window.__uilibWait) {
+    const waiters = new Set();
+
+    const check = () => {
+        for (const w of waiters) {
+            const value = w.test();
+            if (value) {
+                waiters.delete(w);
+                w.done({ ok: true, value });
+            }
+        }
+    };
+
+    new MutationObserver(check).observe(document.documentElement, {
+        subtree: true,
+        childList: true,
+        attributes: true
+    });
+
+    window.__uilibWait = (test, timeoutMs, done) => {
+        const value = test();
+        if (value)
+            return done({ ok: true, value });
+
+        const w = { test, done };
+        waiters.add(w);
+        setTimeout(() => {
+            if (waiters.delete(w))
+                done({ ok: false });
+        }, timeoutMs);
+    };
+}
+
+const test = new Function(body);
+window.__uilibWait(() => test(...args), timeoutMs, done);
+'''
+
+# Selenium's own script timeout (30s by default) has to outlast the
+# wait, or a long wait fails with ScriptTimeoutException instead of
+# its message. It's only changed when a wait needs a different one so
+# that waits stay a single round trip.
+_SCRIPT_TIMEOUT_MARGIN = 5
+
+def _ensure_script_timeout(driver, timeout):
+    needed = timeout + _SCRIPT_TIMEOUT_MARGIN
+    if getattr(driver, '_uilib_script_timeout', None) != needed:
+        driver.set_script_timeout(needed)
+        driver._uilib_script_timeout = needed
+
+def wait_until(driver, body, *args, timeout=10, message=''):
+    _ensure_script_timeout(driver, timeout)
+    with profile.timed('waits'):
+        result = driver.execute_async_script(_WAIT_SCRIPT, body, args, timeout * 1000)
+    if not result['ok']:
+        raise TimeoutException(message)
+    return result['value']
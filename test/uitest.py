@@ -3,16 +3,31 @@
 import unittest
 
 from uilib.site import Site
+from uilib.parallel import main
 
 import os
 import sys
 from urllib.parse import urlparse
 
-site = Site.instance()
+site = None
 
-class TestLogin(unittest.TestCase):
+def setUpModule():
+    global site
+    site = Site.instance()
+
+def tearDownModule():
+    Site.closeInstance()
+
+# Each class starts from the freshly seeded databases so that state
+# created by one class can't leak into another
+class SiteTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        site.restoreSnapshot()
+
+class TestLogin(SiteTestCase):
     def setUp(self):
-        site.logOut()
+        site.resetSession()
 
     def assertUri(self, uri):
         current = urlparse(site.currentUri())
@@ -43,29 +58,73 @@ class TestLogin(unittest.TestCase):
         self.assertUri(uri)
 
     def test_logout_redirects_to_base_page(self):
-        baseUri = site.currentUri()
+        baseUri = f"{site.uri}/"
         site.logInAsUser('admin')
         site.gotoHelloPage()
         site.logOut()
         self.assertUri(baseUri)
 
     def test_admin_can_see_users_groups_page_on_admin_screen(self):
-        site.logInAsUser('admin')
-        page = site.gotoAdminPage()
+        site.http.logInAsUser('admin')
+        page = site.http.gotoAdminPage()
         self.assertTrue(page.hasUsersSection())
         self.assertTrue(page.hasGroupsSection())
 
     def test_designer_cannot_see_users_groups_page_on_admin_screen(self):
-        site.logInAsUser('designer')
-        page = site.gotoAdminPage()
+        site.http.logInAsUser('designer')
+        page = site.http.gotoAdminPage()
         self.assertFalse(page.hasUsersSection())
         self.assertFalse(page.hasGroupsSection())
 
-class TestConfig(unittest.TestCase):
+class TestConfig(SiteTestCase):
     def test_renders_landing_page(self):
-        self.assertTrue(site.gotoLandingPage())
+        self.assertTrue(site.http.gotoLandingPage())
+
+# Server rendered permission checks that don't need a browser. The
+# page objects recognize a page by its heading, so each denial has a
+# matching positive control to show the page is found when allowed.
+class TestPermissions(SiteTestCase):
+    def test_admin_can_edit_group(self):
+        site.http.logInAsUser('admin')
+        page = site.http.gotoGroupSelectPage()
+        self.assertIsNotNone(page)
+
+    def test_admin_can_edit_user(self):
+        site.http.logInAsUser('admin')
+        page = site.http.gotoUserSelectPage()
+        self.assertIsNotNone(page)
+
+    def test_designer_can_edit_palette(self):
+        site.http.logInAsUser('designer')
+        page = site.http.gotoColorPaletteSelectPage()
+        self.assertIsNotNone(page)
+
+    def test_designer_can_edit_theme(self):
+        site.http.logInAsUser('designer')
+        page = site.http.gotoThemeSelectPage()
+        self.assertIsNotNone(page)
+
+    def test_designer_cannot_edit_group(self):
+        site.http.logInAsUser('designer')
+        page = site.http.gotoGroupSelectPage()
+        self.assertIsNone(page)
 
-class TestGroups(unittest.TestCase):
+    def test_designer_cannot_edit_user(self):
+        site.http.logInAsUser('designer')
+        page = site.http.gotoUserSelectPage()
+        self.assertIsNone(page)
+
+    def test_pleb_cannot_edit_palette(self):
+        site.http.logInAsUser('pleb')
+        page = site.http.gotoColorPaletteSelectPage()
+        self.assertIsNone(page)
+
+    def test_pleb_cannot_edit_theme(self):
+        site.http.logInAsUser('pleb')
+        page = site.http.gotoThemeSelectPage()
+        self.assertIsNone(page)
+
+class TestGroups(SiteTestCase):
     def setUp(self):
         site.logInAsUser('admin')
 
@@ -77,11 +136,6 @@ class TestGroups(unittest.TestCase):
         select = site.gotoGroupSelectPage()
         self.assertFalse(select.hasGroupname('foo'))
 
-    def test_designer_cannot_edit_group(self):
-        site.logInAsUser('designer')
-        page = site.gotoGroupSelectPage()
-        self.assertIsNone(page)
-
     def test_group_is_editable(self):
         edit = site.createGroup('edit_me')
 
@@ -104,7 +158,7 @@ class TestGroups(unittest.TestCase):
         self.assertFalse(edit.hasSecurity('shell', 'edit_security'))
         self.assertTrue(edit.hasSecurity('hello', 'edit_greeting'))
 
-class TestUsers(unittest.TestCase):
+class TestUsers(SiteTestCase):
     def setUp(self):
         site.logInAsUser('admin')
 
@@ -116,11 +170,6 @@ class TestUsers(unittest.TestCase):
         select = site.gotoUserSelectPage()
         self.assertFalse(select.hasUsername('foo'))
 
-    def test_designer_cannot_edit_user(self):
-        site.logInAsUser('designer')
-        page = site.gotoUserSelectPage()
-        self.assertIsNone(page)
-
     def test_user_is_editable(self):
         edit = site.createUser('edit_me', 'designers')
 
@@ -147,7 +196,7 @@ class TestUsers(unittest.TestCase):
         self.assertTrue(edit.isGroupMember('designers'))
         self.assertSetEqual(edit.emails(), emails)
 
-class TestColorPalette(unittest.TestCase):
+class TestColorPalette(SiteTestCase):
     def setUp(self):
         site.logInAsUser('designer')
 
@@ -156,11 +205,6 @@ class TestColorPalette(unittest.TestCase):
         select = site.gotoColorPaletteSelectPage()
         self.assertTrue(select.hasPalette('Can Create'))
 
-    def test_pleb_cannot_edit_palette(self):
-        site.logInAsUser('pleb')
-        page = site.gotoColorPaletteSelectPage()
-        self.assertIsNone(page)
-
     def test_palette_is_editable(self):
         edit = site.createPalette('Edit me')
 
@@ -188,7 +232,7 @@ class TestColorPalette(unittest.TestCase):
             'Blue': '#0000ff'
             })
 
-class TestTheme(unittest.TestCase):
+class TestTheme(SiteTestCase):
     def setUp(self):
         site.logInAsUser('designer')
 
@@ -199,18 +243,14 @@ class TestTheme(unittest.TestCase):
         select = site.gotoThemeSelectPage()
         self.assertTrue(select.hasTheme('Can Create'))
 
-    def test_pleb_cannot_edit_theme(self):
-        site.logInAsUser('pleb')
-        page = site.gotoThemeSelectPage()
-        self.assertIsNone(page)
-
     def test_theme_is_editable(self):
         # Set up palette
-        palette = site.createPalette('For theme')
-        palette.setColor('New Color', name='Red', color='#ff0000')
-        palette.addColor(name='Green', color='#00ff00')
-        palette.addColor(name='Blue', color='#0000ff')
-        palette.waitSave()
+        with site.seeder() as seed:
+            seed.createPalette('For theme', {
+                'Red': '#ff0000',
+                'Green': '#00ff00',
+                'Blue': '#0000ff',
+                })
 
         # Create theme
         edit = site.createTheme()
@@ -276,4 +316,4 @@ class TestTheme(unittest.TestCase):
         self.assertEqual('Christmas', mappings['hello']['greeting'])
 
 if __name__ == '__main__':
-    unittest.main()
+    main(sys.modules[__name__])